@@ -0,0 +1,82 @@
+"""
+ベンチマーク: フォルダの列挙
+Path.iterdir()＋is_dir()/is_file() の従来方式と、os.scandir によるスナップショットを比較し、
+所要時間とエントリごとのstat呼び出し回数（ネットワーク共有では1回ごとに往復が発生）を計測
+
+実行方法:
+    python -m benchmarks.bench_dir_snapshot [フォルダ数] [ファイル数]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+from utils.dir_snapshot import DirSnapshot, iter_entries
+
+
+def build_tree(root, folders, files):
+    """FolderCreatorの出力と同じ形式のフォルダと、振り分け前のファイルを作成"""
+    target = root / "CSVFolders"
+    source = root / "source"
+    target.mkdir()
+    source.mkdir()
+    for index in range(folders):
+        (target / f"{index:08d}@school.jp").mkdir()
+    for index in range(files):
+        (source / f"{index:08d}_ライセンス情報.pdf").touch()
+    return target, source
+
+
+def legacy_listing(target, source):
+    """従来方式: iterdir() の後にエントリごとに is_dir()/is_file() を呼ぶ"""
+    folders = [d for d in target.iterdir() if d.is_dir()]
+    files = [f for f in source.iterdir() if f.is_file()]
+    return folders, files
+
+
+def snapshot_listing(target, source):
+    """スナップショット方式: os.scandir のDirEntryの種類情報を使う"""
+    folders = DirSnapshot(target).dir_paths()
+    files = [source / entry.name for entry in iter_entries(source, "file")]
+    return folders, files
+
+
+def measure(listing, target, source):
+    """所要時間とos.statの呼び出し回数を計測"""
+    real_stat = os.stat
+    calls = [0]
+    
+    def counting_stat(*args, **kwargs):
+        calls[0] += 1
+        return real_stat(*args, **kwargs)
+    
+    with mock.patch("os.stat", counting_stat):
+        start = time.perf_counter()
+        folders, files = listing(target, source)
+        elapsed = time.perf_counter() - start
+    return sorted(folders), sorted(files), elapsed, calls[0]
+
+
+def main():
+    folders = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    files = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    
+    root = Path(tempfile.mkdtemp(prefix="bench_dir_snapshot_"))
+    try:
+        target, source = build_tree(root, folders, files)
+        
+        legacy = measure(legacy_listing, target, source)
+        snapshot = measure(snapshot_listing, target, source)
+        assert legacy[:2] == snapshot[:2], "列挙結果が一致しません"
+        
+        print(f"フォルダ数: {folders}, ファイル数: {files}")
+        print(f"従来方式: {legacy[2]:.3f}秒, stat呼び出し: {legacy[3]}回")
+        print(f"スナップショット方式: {snapshot[2]:.3f}秒, stat呼び出し: {snapshot[3]}回")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+ベンチマーク: Step 5 ファイル一括コピー
+コピー先ごとに shutil.copy2 を呼ぶ従来方式と、コピー元を1回だけ開くファンアウトコピーを比較
+
+実行方法:
+    python -m benchmarks.bench_fanout_copy [ファイルサイズ(MB)] [コピー先フォルダ数]
+"""
+import os
+import sys
+import time
+import shutil
+import filecmp
+import tempfile
+from pathlib import Path
+from utils.fanout_copy import FanoutCopier
+
+
+def build_tree(root, size_mb, folders):
+    """配布用のファイルとFolderCreatorの出力と同じ形式のサブフォルダを作成"""
+    source = root / "お知らせ.pdf"
+    with open(source, "wb") as f:
+        for _ in range(size_mb):
+            f.write(os.urandom(1024 * 1024))
+    subfolders = []
+    for index in range(folders):
+        subfolder = root / "CSVFolders" / f"{index:08d}@school.jp"
+        subfolder.mkdir(parents=True)
+        subfolders.append(subfolder)
+    return source, subfolders
+
+
+def legacy_copy(source, subfolders):
+    """従来方式: コピー先ごとに shutil.copy2（毎回コピー元を開いて読み込む）"""
+    for subfolder in subfolders:
+        shutil.copy2(source, subfolder / source.name)
+
+
+def fanout_copy(source, subfolders):
+    """ファンアウト方式: コピー元を1回だけ開き、全コピー先に書き込む"""
+    with FanoutCopier(source) as copier:
+        for subfolder in subfolders:
+            copier.copy_to(subfolder / source.name)
+    return copier
+
+
+def clear(source, subfolders):
+    """コピー先のファイルを削除"""
+    for subfolder in subfolders:
+        (subfolder / source.name).unlink(missing_ok=True)
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    folders = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    total_mb = size_mb * folders
+    
+    root = Path(tempfile.mkdtemp(prefix="bench_fanout_copy_"))
+    try:
+        source, subfolders = build_tree(root, size_mb, folders)
+        
+        start = time.perf_counter()
+        legacy_copy(source, subfolders)
+        legacy_time = time.perf_counter() - start
+        clear(source, subfolders)
+        
+        start = time.perf_counter()
+        copier = fanout_copy(source, subfolders)
+        fanout_time = time.perf_counter() - start
+        
+        assert all(filecmp.cmp(source, subfolder / source.name, shallow=False) for subfolder in subfolders), \
+            "コピー結果が一致しません"
+        
+        print(f"ファイルサイズ: {size_mb} MB, コピー先: {folders}フォルダ, 合計: {total_mb} MB")
+        print(f"従来方式（copy2）: {legacy_time:.2f}秒（{total_mb / legacy_time:.1f} MB/秒）, コピー元を開いた回数: {folders}回")
+        print(f"ファンアウト方式: {fanout_time:.2f}秒（{total_mb / fanout_time:.1f} MB/秒）, コピー元を開いた回数: 1回")
+        print(f"コピー方式: {copier.method_summary()}")
+        print(f"高速化: {legacy_time / fanout_time:.2f}倍")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
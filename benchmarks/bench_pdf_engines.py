@@ -0,0 +1,52 @@
+"""
+ベンチマーク: Step 3 描画エンジン比較
+platypus（従来方式）とキャンバス直接描画の1文書あたりの生成時間と、
+通常出力・コンパクト出力（フォント埋め込み＋圧縮）の平均サイズを比較
+
+実行方法:
+    python -m benchmarks.bench_pdf_engines [文書数]
+"""
+import sys
+import time
+from modules.license_pdf_generator import LicensePdfGenerator, PDF_ENGINES
+
+
+def sample_textbooks(index, count=4):
+    """生徒1人分の合成教科書データを作成"""
+    return [
+        {
+            "name": f"教科書{i}",
+            "id": f"student{index:05d}_{i}",
+            "password": f"pw{index:05d}{i}",
+            "serial": f"SN-{index:05d}-{i}" if i % 2 == 0 else "",
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    timestamp_str = "2025.04.01"
+    
+    timings = {}
+    for compact in (False, True):
+        for engine in PDF_ENGINES:
+            generator = LicensePdfGenerator(workers=1, engine=engine, compact=compact)
+            label = generator._render_mode()
+            
+            total_bytes = 0
+            start = time.perf_counter()
+            for index in range(documents):
+                total_bytes += len(generator._render_pdf_bytes(sample_textbooks(index), timestamp_str))
+            timings[label] = time.perf_counter() - start
+            
+            print(
+                f"{label:16s}: {timings[label]:7.3f}秒 "
+                f"({timings[label] / documents * 1000:6.2f}ミリ秒/文書, 平均 {total_bytes // documents}バイト/文書)"
+            )
+    
+    print(f"高速化: {timings['platypus'] / timings['canvas']:.1f}倍")
+
+
+if __name__ == "__main__":
+    main()
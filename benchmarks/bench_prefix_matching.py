@@ -0,0 +1,89 @@
+"""
+ベンチマーク: Step 4 ファイル振り分けの照合
+ファイルごとに全フォルダを走査する従来方式と、接頭辞索引・PrefixMatcher（auto は接頭辞索引、
+longest・account はトライ木）による照合を比較
+
+実行方法:
+    python -m benchmarks.bench_prefix_matching [ファイル数] [フォルダ数]
+"""
+import sys
+import time
+from pathlib import PurePath
+from utils.prefix_matcher import PrefixMatcher, build_prefix_index
+
+
+MATCH_LENGTH = 8
+
+
+def build_names(files, folders):
+    """
+    合成のファイル名・フォルダ名を作成
+    
+    フォルダ名は FileRenamer・FolderCreator の出力と同じ「アカウント名@ドメイン」形式で、
+    ファイルの1割はどのフォルダにも該当しない。
+    """
+    folder_paths = [PurePath(f"{index:08d}@school.jp") for index in range(folders)]
+    file_names = [f"{(index * 7919) % (folders + folders // 10):08d}_ライセンス情報.pdf" for index in range(files)]
+    return file_names, folder_paths
+
+
+def legacy_match(file_names, folder_paths, match_length):
+    """従来方式: ファイルごとに全フォルダの先頭N文字を切り出して比較"""
+    matches = []
+    for file_name in file_names:
+        file_prefix = file_name[:match_length] if len(file_name) >= match_length else file_name
+        match = None
+        for target_folder in folder_paths:
+            folder_name = target_folder.name
+            folder_prefix = folder_name[:match_length] if len(folder_name) >= match_length else folder_name
+            if folder_prefix == file_prefix:
+                match = target_folder
+                break
+        matches.append(match)
+    return matches
+
+
+def indexed_match(file_names, folder_paths, match_length):
+    """索引方式: フォルダの接頭辞索引を1回作成し、ファイルごとに辞書で引く"""
+    index, _ = build_prefix_index(folder_paths, match_length)
+    return [index.get(file_name[:match_length]) for file_name in file_names]
+
+
+def matcher_match(file_names, folder_paths, mode):
+    """PrefixMatcher: 照合方法ごとに作成し、ファイルごとに照合（名前の正規化を含む）"""
+    matcher = PrefixMatcher(folder_paths, mode, MATCH_LENGTH, min_length=4)
+    return [matcher.match(file_name)[0] for file_name in file_names]
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    folders = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    file_names, folder_paths = build_names(files, folders)
+    
+    start = time.perf_counter()
+    legacy = legacy_match(file_names, folder_paths, MATCH_LENGTH)
+    legacy_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    indexed = indexed_match(file_names, folder_paths, MATCH_LENGTH)
+    indexed_time = time.perf_counter() - start
+    
+    assert legacy == indexed, "照合結果が一致しません"
+    
+    matched = sum(1 for match in indexed if match is not None)
+    print(f"ファイル数: {files}, フォルダ数: {folders}, マッチ: {matched}件")
+    print(f"従来方式: {legacy_time:.3f}秒")
+    print(f"索引方式: {indexed_time:.3f}秒")
+    print(f"高速化: {legacy_time / indexed_time:.0f}倍")
+    
+    # PrefixMatcherによる照合（索引の作成時間を含む）
+    for mode in ("auto", "longest", "account"):
+        start = time.perf_counter()
+        matched_folders = matcher_match(file_names, folder_paths, mode)
+        matcher_time = time.perf_counter() - start
+        assert matched_folders == legacy, f"照合結果が一致しません: {mode}"
+        print(f"PrefixMatcher（{mode}）: {matcher_time:.3f}秒")
+
+
+if __name__ == "__main__":
+    main()
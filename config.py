@@ -17,3 +17,42 @@ DEFAULT_OUTPUT_DIR = Path.home() / "Downloads"
 # CSV設定
 CSV_ENCODING_PRIMARY = "utf-8"
 CSV_ENCODING_SECONDARY = "shift-jis"
+
+# Step 2: フォルダ作成
+FOLDER_CREATE_WORKERS = 8  # フォルダ作成の並列スレッド数（ネットワーク共有向け、1: 逐次処理）
+FOLDER_LAYOUT = "flat"  # 個人フォルダの構成（"flat": ルート直下 / "column": 列の値ごと / "hash": アカウント名のハッシュごと / "prefix": アカウント名の先頭文字ごと）
+FOLDER_LAYOUT_DEPTH = 1  # hash / prefix のシャードの階層数
+FOLDER_LAYOUT_WIDTH = 2  # hash / prefix の1階層あたりの文字数（hashで2文字: 256個のシャード）
+FOLDER_LAYOUT_COLUMNS = ["学年", "組"]  # column のシャードに使う生徒マスタの列名（上位の階層から順に）
+
+# Step 3: ライセンスPDF作成
+PDF_RENDER_WORKERS = None  # 並列レンダリングのプロセス数（None: CPUコア数、1: 逐次処理）
+PDF_PARALLEL_MIN_STUDENTS = 20  # この人数未満の場合は逐次処理
+PDF_ENGINE = "platypus"  # 描画エンジン（"platypus": 従来方式、"canvas": キャンバス直接描画）
+PRINT_BATCH_VOLUME_SIZE = 0  # 印刷用一括PDFの1冊あたりの生徒数（0: 分冊しない）
+STREAMING_MIN_CSV_MB = 50  # このサイズ以上のCSVはチャンクごとに読み込んで処理（0: 常にチャンク処理）
+STREAMING_CHUNK_ROWS = 2000  # チャンク処理で1回に読み込む行数
+PDF_WRITE_BATCH_SIZE = 50  # 描画済みPDFをメモリに溜めてまとめて書き込む件数
+PDF_COMPACT_MODE = False  # コンパクト出力（日本語フォントのサブセット埋め込み＋ストリーム圧縮）
+PDF_EMBED_FONT_PATHS = [  # コンパクト出力で埋め込むTrueType日本語フォント（先に見つかったものを使用）
+    "C:/Windows/Fonts/msgothic.ttc",
+    "C:/Windows/Fonts/meiryo.ttc",
+    "~/Library/Fonts/ipag.ttf",
+    "/usr/share/fonts/opentype/ipafont-gothic/ipag.ttf",
+    "/usr/share/fonts/truetype/fonts-japanese-gothic.ttf",
+]
+PDF_REPRODUCIBLE = False  # 同じ入力から常に同じバイト列のPDFを作成し、既存ファイルと同一なら書き込まない
+
+# Step 4: ファイル振り分け
+PREFIX_MATCH_MIN_LENGTH = 4  # 最長一致（longest）で候補を報告する最低限の一致文字数（アカウント名全体が一致すれば不要）、自動判定（auto）の最短の文字数
+COPY_WORKERS = 8  # コピーの並列スレッド数（ネットワーク共有向け、1: 逐次処理）
+PLACEMENT_MODE = "copy"  # 振り分け時の配置方法（"copy" / "move" / "hardlink" / "reflink"）
+FOLDER_INDEX_CACHE = True  # 振り分け先ルートにフォルダ一覧のキャッシュ（.folder_index.json）を保存して再利用
+SYNC_COMPARE_DIGEST = False  # 既存ファイルの比較でサイズが同じ・更新日時が異なる場合に内容のダイジェストも比較
+
+# Step 5: ファイル一括コピー
+FANOUT_MODE = "copy"  # 配置方法（"copy" / "hardlink": ハードリンク / "reflink": copy-on-writeによる複製）
+FANOUT_WORKERS = 16  # コピーの最大並列数（1: 逐次処理）
+FANOUT_INITIAL_WORKERS = 2  # 並列数の自動調整を始めるときの並列数
+FANOUT_AUTO_TUNE = True  # 所要時間とMB/秒を見て並列数を自動調整（False: FANOUT_WORKERSで固定）
+FANOUT_SYNC_COMPARE_DIGEST = False  # 同期モードでサイズが同じ・更新日時が異なる場合に内容のダイジェストも比較
@@ -2,6 +2,7 @@
 パスワードお知らせシステム - メインエントリーポイント
 """
 import sys
+import multiprocessing
 
 def check_dependencies():
     """依存関係チェック"""
@@ -50,4 +51,6 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # PyInstallerでexe化した場合のプロセスプール（Step 3の並列レンダリング）対応
+    multiprocessing.freeze_support()
     main()
@@ -1,19 +1,46 @@
 """
 Module5: ファイル一括コピー
 指定したファイルをすべてのサブフォルダにコピー
+配布リストCSVを使う場合は、複数のファイルをそれぞれ指定したサブフォルダに一括でコピー
 """
 import os
-import shutil
+import time
+from fnmatch import fnmatchcase
+from contextlib import ExitStack
 from pathlib import Path
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, simpledialog
 from utils.logger import get_logger
 from utils.file_operations import open_folder
+from utils.csv_handler import read_csv
+from utils.unicode_normalizer import normalize_match_key, clean_foldername
+from utils.folder_layout import load_folder_layout
+from utils.fanout_copy import (
+    FanoutCopier, FANOUT_MODES, FANOUT_METHOD_LABELS, format_throughput, format_method_counts
+)
+from utils.adaptive_pool import AdaptiveConcurrency, run_adaptive
+import config
 
 
 logger = get_logger()
 
 
+# 配布リストCSVの配布ファイル列の区切り文字
+DISTRIBUTION_FILE_SEPARATOR = ";"
+
+# 同期モードの結果
+SYNC_STATUS_LABELS = {
+    "new": "新規",
+    "updated": "更新",
+    "unchanged": "変更なし",
+}
+
+
+def _has_wildcard(pattern):
+    """配布リストのフォルダ名のパターンがワイルドカードを含むか"""
+    return any(char in pattern for char in "*?[")
+
+
 class FileCopier:
     """ファイル一括コピークラス"""
     
@@ -21,6 +48,15 @@ class FileCopier:
         self.copied_count = 0
         self.error_count = 0
         self.results = []
+        self.copy_summary = ""
+        self.mode = config.FANOUT_MODE
+        self.link_count = 0
+        self.copy_count = 0
+        self.method_counts = {}
+        self.sync_mode = False
+        self.new_count = 0
+        self.updated_count = 0
+        self.unchanged_count = 0
     
     def run(self):
         """
@@ -33,6 +69,16 @@ class FileCopier:
         logger.info("Step 5: ファイル一括コピーを開始")
         logger.info("=" * 60)
         
+        # 配布方法を選択
+        use_distribution_list = messagebox.askyesno(
+            "配布方法",
+            "配布リストCSVを使って、複数のファイルをそれぞれ指定したフォルダに一括でコピーしますか？\n\n"
+            "（「いいえ」を選ぶと1つのファイルをすべてのサブフォルダにコピーします）"
+        )
+        if use_distribution_list:
+            logger.info("配布方法: 配布リストCSV")
+            return self._run_distribution_list()
+        
         # ファイルを選択
         source_file = self._select_source_file()
         if not source_file:
@@ -45,6 +91,16 @@ class FileCopier:
             logger.info("フォルダの選択がキャンセルされました")
             return False
         
+        # 配置方法を入力
+        mode = self._input_mode()
+        if mode is None:
+            logger.info("配置方法の入力がキャンセルされました")
+            return False
+        self.mode = mode
+        
+        # 既存ファイルの扱いを選択
+        self._ask_sync_mode()
+        
         source_path = Path(source_file)
         target_path = Path(target_folder)
         
@@ -67,9 +123,10 @@ class FileCopier:
         try:
             logger.info(f"コピー元ファイル: {source_path}")
             logger.info(f"コピー先フォルダ: {target_path}")
+            logger.info(f"配置方法: {FANOUT_METHOD_LABELS.get(self.mode, 'コピー')}")
             
-            # サブフォルダ数をカウント
-            subfolders = [d for d in target_path.iterdir() if d.is_dir()]
+            # サブフォルダ数をカウント（シャード構成の場合はシャードの下の個人フォルダ）
+            subfolders = load_folder_layout(target_path).leaf_folders(target_path)
             logger.info(f"対象サブフォルダ数: {len(subfolders)}")
             
             if len(subfolders) == 0:
@@ -82,7 +139,9 @@ class FileCopier:
                 f"以下の操作を実行します:\n\n"
                 f"ファイル: {source_path.name}\n"
                 f"コピー先: {target_path}\n"
-                f"対象サブフォルダ数: {len(subfolders)}個\n\n"
+                f"対象サブフォルダ数: {len(subfolders)}個\n"
+                f"配置方法: {FANOUT_METHOD_LABELS.get(self.mode, 'コピー')}\n"
+                f"既存ファイル: {self._existing_label()}\n\n"
                 f"すべてのサブフォルダにファイルをコピーします。\n\n"
                 f"実行しますか？"
             )
@@ -90,35 +149,8 @@ class FileCopier:
                 logger.info("ユーザーが処理をキャンセルしました")
                 return False
             
-            # コピー実行
-            self.copied_count = 0
-            self.error_count = 0
-            self.results = []
-            
-            for i, subfolder in enumerate(subfolders, 1):
-                destination = subfolder / source_path.name
-                
-                try:
-                    shutil.copy2(source_path, destination)
-                    self.copied_count += 1
-                    result_msg = f"✓ {subfolder.name}/{source_path.name}"
-                    self.results.append(result_msg)
-                    logger.info(f"コピー成功 ({i}/{len(subfolders)}): {destination}")
-                except Exception as e:
-                    self.error_count += 1
-                    result_msg = f"✗ {subfolder.name}/{source_path.name} - エラー: {e}"
-                    self.results.append(result_msg)
-                    logger.error(f"コピー失敗 ({i}/{len(subfolders)}): {destination} - {e}")
-                
-                # 進捗表示（10件ごと）
-                if i % 10 == 0:
-                    logger.info(f"進捗: {i}/{len(subfolders)} フォルダ処理済み")
-            
-            logger.info("=" * 60)
-            logger.info(f"ファイル一括コピー完了")
-            logger.info(f"成功: {self.copied_count}件")
-            logger.info(f"失敗: {self.error_count}件")
-            logger.info("=" * 60)
+            # コピー実行（コピー元は1回だけ開き、全サブフォルダへ書き込む）
+            self._execute([(source_path, subfolder) for subfolder in subfolders])
             
             # 結果表示
             result_msg = (
@@ -126,21 +158,161 @@ class FileCopier:
                 f"ファイル: {source_path.name}\n"
                 f"対象フォルダ数: {len(subfolders)}\n\n"
                 f"成功: {self.copied_count}個\n"
-                f"失敗: {self.error_count}個"
+                f"{self._sync_breakdown()}"
+                f"失敗: {self.error_count}個\n"
+                f"（リンク: {self.link_count}個、コピー: {self.copy_count}個）\n"
+                f"書き込み: {self.copy_summary}"
             )
             
             if self.copied_count == 0:
                 result_msg += "\n\nサブフォルダが見つかりませんでした"
             
             messagebox.showinfo("完了", result_msg)
+            self._log_details()
+            
+            # ターゲットフォルダを開く
+            try:
+                open_folder(target_path)
+            except Exception as e:
+                logger.warning(f"フォルダを開けませんでした: {e}")
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"ファイル一括コピー中にエラーが発生しました: {e}")
+            messagebox.showerror("エラー", f"ファイル一括コピー中にエラーが発生しました:\n{str(e)}")
+            import traceback
+            traceback.print_exc()
+            return False
+    
+    def _run_distribution_list(self):
+        """
+        配布リストCSVに従って複数のファイルを一括コピー
+        
+        配布リストCSVは1列目にフォルダ名のパターン（* ? によるワイルドカード）またはメールアドレス、
+        2列目に配布ファイル（「;」区切りで複数可、相対パスはCSVのフォルダ基準）を記入する。
+        サブフォルダは1回だけ列挙し、全ての（ファイル, フォルダ）の組を1つのジョブとして実行する。
+        
+        Returns:
+            bool: 成功した場合True
+        """
+        # 配布リストCSVを選択
+        csv_file = self._select_distribution_csv()
+        if not csv_file:
+            logger.info("配布リストCSVの選択がキャンセルされました")
+            return False
+        
+        # 対象フォルダを選択
+        target_folder = self._select_target_folder()
+        if not target_folder:
+            logger.info("フォルダの選択がキャンセルされました")
+            return False
+        
+        # 配置方法を入力
+        mode = self._input_mode()
+        if mode is None:
+            logger.info("配置方法の入力がキャンセルされました")
+            return False
+        self.mode = mode
+        
+        # 既存ファイルの扱いを選択
+        self._ask_sync_mode()
+        
+        target_path = Path(target_folder)
+        if not target_path.exists():
+            messagebox.showerror("エラー", f"フォルダが存在しません:\n{target_folder}")
+            logger.error(f"フォルダが存在しません: {target_folder}")
+            return False
+        
+        try:
+            rows = self._load_distribution_list(csv_file)
+            if rows is None:
+                return False
+            
+            logger.info(f"配布リスト: {csv_file}（{len(rows)}行）")
+            logger.info(f"コピー先フォルダ: {target_path}")
+            logger.info(f"配置方法: {FANOUT_METHOD_LABELS.get(self.mode, 'コピー')}")
             
-            # 詳細ログを出力
-            logger.info("\n" + "=" * 60)
-            logger.info("コピー結果の詳細:")
-            logger.info("=" * 60)
-            for result in self.results:
-                logger.info(result)
-            logger.info("=" * 60)
+            # サブフォルダは1回だけ列挙
+            # （シャード構成でワイルドカードを使わない場合は、列挙せずにメールアドレスから個人フォルダを求める）
+            layout = load_folder_layout(target_path)
+            if layout.sharded and not any(_has_wildcard(pattern) for pattern, _ in rows):
+                logger.info(f"フォルダ構成: {layout.describe()}（個人フォルダを直接参照）")
+                tasks, unmatched, collisions = self._resolve_distribution(
+                    rows, [], find_folder=lambda pattern: layout.folder_for(target_path, pattern)
+                )
+            else:
+                subfolders = layout.leaf_folders(target_path)
+                logger.info(f"対象サブフォルダ数: {len(subfolders)}")
+                tasks, unmatched, collisions = self._resolve_distribution(rows, subfolders)
+            for pattern in unmatched:
+                logger.warning(f"該当するフォルダがありません: {pattern}")
+            for subfolder, file_path, first_path in collisions:
+                logger.warning(
+                    f"コピー先のファイル名が重複するためコピーしません: {subfolder.name}/{file_path.name}"
+                    f"（{file_path} / 先にコピーするファイル: {first_path}）"
+                )
+            
+            if not tasks:
+                messagebox.showinfo("情報", "配布リストに該当するサブフォルダがありませんでした。")
+                logger.info("配布リストに該当するサブフォルダがありませんでした")
+                return False
+            
+            source_count = len({source_path for source_path, _ in tasks})
+            folder_count = len({subfolder for _, subfolder in tasks})
+            logger.info(f"配布ファイル数: {source_count}、コピー先フォルダ数: {folder_count}、コピー件数: {len(tasks)}")
+            
+            # 確認ダイアログ
+            unmatched_msg = ""
+            if unmatched:
+                unmatched_msg = f"※ 該当するフォルダがない行: {len(unmatched)}行（ログを確認してください）\n"
+            if collisions:
+                examples = "\n".join(
+                    f"　{subfolder.name}/{file_path.name}: {first_path} と {file_path}"
+                    for subfolder, file_path, first_path in collisions[:5]
+                )
+                more = f"\n　…ほか{len(collisions) - 5}件" if len(collisions) > 5 else ""
+                unmatched_msg += (
+                    f"※ 同じフォルダに同じ名前の別のファイル: {len(collisions)}件"
+                    f"（配布リストで先の行のファイルのみコピー）\n{examples}{more}\n"
+                )
+            confirm_msg = (
+                f"以下の操作を実行します:\n\n"
+                f"配布リスト: {Path(csv_file).name}\n"
+                f"コピー先: {target_path}\n"
+                f"配布ファイル数: {source_count}個\n"
+                f"コピー先フォルダ数: {folder_count}個\n"
+                f"コピー件数: {len(tasks)}件\n"
+                f"配置方法: {FANOUT_METHOD_LABELS.get(self.mode, 'コピー')}\n"
+                f"既存ファイル: {self._existing_label()}\n"
+                f"{unmatched_msg}\n"
+                f"実行しますか？"
+            )
+            if not messagebox.askyesno("確認", confirm_msg):
+                logger.info("ユーザーが処理をキャンセルしました")
+                return False
+            
+            # 全ての組を1つのジョブとして実行（各ファイルは1回だけ開く）
+            self._execute(tasks)
+            
+            # 結果表示
+            result_msg = (
+                f"ファイル一括コピー完了（配布リスト）!\n\n"
+                f"配布ファイル数: {source_count}\n"
+                f"コピー先フォルダ数: {folder_count}\n\n"
+                f"成功: {self.copied_count}件\n"
+                f"{self._sync_breakdown()}"
+                f"失敗: {self.error_count}件\n"
+                f"（リンク: {self.link_count}件、コピー: {self.copy_count}件）\n"
+                f"書き込み: {self.copy_summary}"
+            )
+            if unmatched:
+                result_msg += f"\n\n該当するフォルダがない行: {len(unmatched)}行"
+            if collisions:
+                result_msg += f"\nファイル名の重複でコピーしなかったファイル: {len(collisions)}件"
+            
+            messagebox.showinfo("完了", result_msg)
+            self._log_details()
             
             # ターゲットフォルダを開く
             try:
@@ -157,6 +329,308 @@ class FileCopier:
             traceback.print_exc()
             return False
     
+    def _load_distribution_list(self, csv_file):
+        """
+        配布リストCSVを読み込む
+        
+        Args:
+            csv_file (str): 配布リストCSVのパス
+        
+        Returns:
+            list or None: (フォルダ名のパターン, 配布ファイル（Path）のリスト) のリスト、
+                          形式が正しくない・ファイルが見つからない場合はNone
+        """
+        df = read_csv(csv_file)
+        if len(df.columns) < 2:
+            messagebox.showerror(
+                "エラー",
+                "配布リストCSVには「フォルダ名またはメールアドレス」と「配布ファイル」の2列が必要です。"
+            )
+            logger.error("配布リストCSVの列数が不足しています")
+            return None
+        
+        base_folder = Path(csv_file).parent
+        rows = []
+        missing = []
+        for pattern, files in zip(df.iloc[:, 0], df.iloc[:, 1]):
+            pattern = pattern.strip()
+            file_paths = []
+            for name in files.split(DISTRIBUTION_FILE_SEPARATOR):
+                name = name.strip()
+                if not name:
+                    continue
+                file_path = Path(name).expanduser()
+                if not file_path.is_absolute():
+                    file_path = base_folder / file_path
+                file_path = Path(os.path.normpath(file_path))
+                if not file_path.is_file():
+                    missing.append(str(file_path))
+                file_paths.append(file_path)
+            if pattern and file_paths:
+                rows.append((pattern, file_paths))
+        
+        if missing:
+            missing = sorted(set(missing))
+            for file_path in missing:
+                logger.error(f"配布ファイルが見つかりません: {file_path}")
+            messagebox.showerror(
+                "エラー",
+                f"配布ファイルが見つかりません（{len(missing)}件）:\n" + "\n".join(missing[:10])
+            )
+            return None
+        
+        if not rows:
+            messagebox.showerror("エラー", "配布リストCSVに配布の指定がありません。")
+            logger.error("配布リストCSVに配布の指定がありません")
+            return None
+        
+        return rows
+    
+    def _resolve_distribution(self, rows, subfolders, find_folder=None):
+        """
+        配布リストの各行に該当するサブフォルダを求め、（配布ファイル, コピー先フォルダ）の組を作成
+        
+        フォルダ名の照合はNFC正規化・大文字小文字を区別しないキーで行う。
+        ワイルドカードを含まない行（メールアドレスなど）は辞書で1回で引く（find_folderを指定した場合はその結果）。
+        別の配布ファイルが同じフォルダの同じファイル名（照合用キーで比較）になる場合は、配布リストで
+        先に出現したファイルのみコピーし、残りは重複として返す。
+        
+        Args:
+            rows (list): (フォルダ名のパターン, 配布ファイルのリスト) のリスト
+            subfolders (list): サブフォルダ（Path）のリスト
+            find_folder (callable): フォルダ名・メールアドレスから個人フォルダを求める関数（見つからない場合None）
+        
+        Returns:
+            tuple: (（配布ファイル, サブフォルダ）のリスト（配布ファイルごとにまとめた順）,
+                    該当するフォルダがなかったパターンのリスト,
+                    (サブフォルダ, コピーしない配布ファイル, 先にコピーする配布ファイル) のリスト)
+        """
+        keyed_folders = [(normalize_match_key(subfolder.name), subfolder) for subfolder in subfolders]
+        folders_by_key = dict(keyed_folders)
+        
+        targets = {}  # 配布ファイル → サブフォルダ → None（順序付きの集合として使用）
+        unmatched = []
+        for pattern, file_paths in rows:
+            if _has_wildcard(pattern):
+                key_pattern = normalize_match_key(pattern)
+                matched = [subfolder for key, subfolder in keyed_folders if fnmatchcase(key, key_pattern)]
+            else:
+                if find_folder is not None:
+                    subfolder = find_folder(pattern)
+                else:
+                    subfolder = folders_by_key.get(normalize_match_key(clean_foldername(pattern)))
+                matched = [subfolder] if subfolder is not None else []
+            
+            if not matched:
+                unmatched.append(pattern)
+                continue
+            
+            for file_path in file_paths:
+                folder_set = targets.setdefault(file_path, {})
+                for subfolder in matched:
+                    folder_set[subfolder] = None
+        
+        tasks = []
+        collisions = []
+        destinations = {}  # (サブフォルダ, ファイル名の照合用キー) → 配布ファイル
+        for file_path, folder_set in targets.items():
+            name_key = normalize_match_key(file_path.name)
+            for subfolder in folder_set:
+                first_path = destinations.setdefault((subfolder, name_key), file_path)
+                if first_path == file_path:
+                    tasks.append((file_path, subfolder))
+                else:
+                    collisions.append((subfolder, file_path, first_path))
+        return tasks, unmatched, collisions
+    
+    def _execute(self, tasks):
+        """
+        （コピー元ファイル, コピー先サブフォルダ）の組をまとめてコピーし、結果を記録
+        
+        コピー元ファイルはそれぞれ1回だけ開き、コピーは同時実行数を自動調整しながら並列に行う。
+        同期モードの場合は、コピー先に存在しないか内容が古いファイルのみコピーする。
+        結果は tasks の順に記録する。
+        
+        Args:
+            tasks (list): (コピー元ファイル（Path）, コピー先サブフォルダ（Path）) のリスト
+        """
+        self.copied_count = 0
+        self.error_count = 0
+        self.new_count = 0
+        self.updated_count = 0
+        self.unchanged_count = 0
+        self.results = []
+        
+        if config.FANOUT_AUTO_TUNE:
+            controller = AdaptiveConcurrency(config.FANOUT_WORKERS, config.FANOUT_INITIAL_WORKERS)
+        else:
+            controller = AdaptiveConcurrency(
+                config.FANOUT_WORKERS, config.FANOUT_WORKERS, min_workers=config.FANOUT_WORKERS
+            )
+        
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            copiers = {}
+            for source_path, _ in tasks:
+                if source_path not in copiers:
+                    copiers[source_path] = stack.enter_context(FanoutCopier(source_path, self.mode))
+            
+            def copy_one(task):
+                source_path, subfolder = task
+                copier = copiers[source_path]
+                destination = subfolder / source_path.name
+                try:
+                    if not self.sync_mode:
+                        copier.copy_to(destination)
+                        return copier.size, None, None
+                    status, _ = copier.sync_to(destination, config.FANOUT_SYNC_COMPARE_DIGEST)
+                    return (0 if status == "unchanged" else copier.size), None, status
+                except Exception as e:
+                    return copier.size, e, None
+            
+            results = run_adaptive(
+                copy_one, tasks, controller,
+                measure=lambda result: (result[0], result[1] is not None)
+            )
+            
+            for i, ((source_path, subfolder), (_, error, status)) in enumerate(zip(tasks, results), 1):
+                destination = subfolder / source_path.name
+                
+                if error is None:
+                    self.copied_count += 1
+                    if status == "new":
+                        self.new_count += 1
+                    elif status == "updated":
+                        self.updated_count += 1
+                    elif status == "unchanged":
+                        self.unchanged_count += 1
+                    status_label = SYNC_STATUS_LABELS.get(status)
+                    result_msg = f"✓ {subfolder.name}/{source_path.name}"
+                    if status_label:
+                        result_msg += f"（{status_label}）"
+                    self.results.append(result_msg)
+                    if status == "unchanged":
+                        logger.info(f"変更なし ({i}/{len(tasks)}): {destination}")
+                    else:
+                        logger.info(f"コピー成功 ({i}/{len(tasks)}): {destination}")
+                else:
+                    self.error_count += 1
+                    result_msg = f"✗ {subfolder.name}/{source_path.name} - エラー: {error}"
+                    self.results.append(result_msg)
+                    logger.error(f"コピー失敗 ({i}/{len(tasks)}): {destination} - {error}")
+                
+                # 進捗表示（10件ごと）
+                if i % 10 == 0:
+                    logger.info(f"進捗: {i}/{len(tasks)} 件処理済み（並列数: {controller.limit}）")
+        
+        elapsed = time.perf_counter() - start
+        
+        # 全コピー元の集計
+        self.link_count = sum(copier.link_count for copier in copiers.values())
+        self.copy_count = sum(copier.copy_count for copier in copiers.values())
+        self.method_counts = {}
+        for copier in copiers.values():
+            for method, count in copier.method_counts.items():
+                self.method_counts[method] = self.method_counts.get(method, 0) + count
+        self.copy_summary = format_throughput(sum(copier.bytes_written for copier in copiers.values()), elapsed)
+        
+        logger.info("=" * 60)
+        logger.info(f"ファイル一括コピー完了")
+        logger.info(f"成功: {self.copied_count}件")
+        if self.sync_mode:
+            logger.info(f"新規: {self.new_count}件")
+            logger.info(f"更新: {self.updated_count}件")
+            logger.info(f"変更なし: {self.unchanged_count}件")
+        logger.info(f"失敗: {self.error_count}件")
+        logger.info(f"配置の内訳: リンク {self.link_count}件、コピー {self.copy_count}件")
+        logger.info(f"コピー方式: {format_method_counts(self.method_counts)}")
+        logger.info(f"書き込み: {self.copy_summary}")
+        if controller.fixed:
+            logger.info(f"並列数: {controller.limit}（固定）")
+        else:
+            logger.info(f"並列数の調整結果: {controller.summary()}")
+            logger.info(
+                f"  → この並列数で固定する場合: config.FANOUT_WORKERS = {controller.best_limit}、"
+                f"config.FANOUT_AUTO_TUNE = False"
+            )
+        logger.info("=" * 60)
+    
+    def _ask_sync_mode(self):
+        """既存ファイルの扱いを選択（同期モード）"""
+        self.sync_mode = messagebox.askyesno(
+            "既存ファイルの扱い",
+            "コピー先に同じ名前のファイルがある場合、内容を比較して\n"
+            "古いファイルのみ置き換えますか？\n\n"
+            "（「いいえ」を選ぶと既存のファイルもすべて置き換えます）"
+        )
+        logger.info(f"既存ファイル: {self._existing_label()}")
+    
+    def _existing_label(self):
+        """既存ファイルの扱いの表示用文字列"""
+        if not self.sync_mode:
+            return "すべて置き換え"
+        compare = "サイズ・更新日時" + ("＋ダイジェスト" if config.FANOUT_SYNC_COMPARE_DIGEST else "")
+        return f"内容を比較して古いファイルのみ置き換え（{compare}）"
+    
+    def _sync_breakdown(self):
+        """同期モードの新規・更新・変更なしの件数の表示用文字列（完了ダイアログ用）"""
+        if not self.sync_mode:
+            return ""
+        return (
+            f"　新規: {self.new_count}件\n"
+            f"　更新: {self.updated_count}件\n"
+            f"　変更なし: {self.unchanged_count}件\n"
+        )
+    
+    def _log_details(self):
+        """コピー結果の詳細をログ出力"""
+        logger.info("\n" + "=" * 60)
+        logger.info("コピー結果の詳細:")
+        logger.info("=" * 60)
+        for result in self.results:
+            logger.info(result)
+        logger.info("=" * 60)
+    
+    def _input_mode(self):
+        """
+        配置方法入力ダイアログ
+        
+        Returns:
+            str or None: 配置方法、キャンセル時はNone
+        """
+        root = tk.Tk()
+        root.withdraw()
+        
+        try:
+            while True:
+                mode = simpledialog.askstring(
+                    "配置方法設定",
+                    "サブフォルダへのファイルの配置方法を入力してください:\n\n"
+                    "- copy: コピー\n"
+                    "- hardlink: ハードリンク（同じドライブ内のみ、容量をほとんど使わない）\n"
+                    "    ※ 1つのフォルダでファイルを編集すると全フォルダのファイルが変わります\n"
+                    "- reflink: copy-on-writeによる複製（対応ファイルシステムのみ）\n\n"
+                    "使用できない場合は自動的にコピーします。",
+                    initialvalue=config.FANOUT_MODE,
+                    parent=root
+                )
+                
+                if mode is None:
+                    # キャンセル
+                    return None
+                
+                mode = mode.strip().lower()
+                if mode in FANOUT_MODES:
+                    return mode
+                
+                messagebox.showerror(
+                    "入力エラー",
+                    "copy、hardlink、reflink のいずれかを入力してください。",
+                    parent=root
+                )
+        finally:
+            root.destroy()
+    
     def _select_source_file(self):
         """コピー元ファイル選択ダイアログ"""
         root = tk.Tk()
@@ -178,6 +652,22 @@ class FileCopier:
         finally:
             root.destroy()
     
+    def _select_distribution_csv(self):
+        """配布リストCSV選択ダイアログ"""
+        root = tk.Tk()
+        root.withdraw()
+        root.update()
+        
+        try:
+            file_path = filedialog.askopenfilename(
+                parent=root,
+                title="【Step5-1】配布リストCSVを選択してください",
+                filetypes=[("CSV Files", "*.csv"), ("All Files", "*.*")]
+            )
+            return file_path if file_path else None
+        finally:
+            root.destroy()
+    
     def _select_target_folder(self):
         """コピー先フォルダ選択ダイアログ"""
         root = tk.Tk()
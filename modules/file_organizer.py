@@ -2,12 +2,21 @@
 Module4: ファイル振り分け（可変マッチング対応）
 ファイルを各生徒のフォルダに配置
 """
+import os
+import time
 from pathlib import Path
-import shutil
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
 from utils.logger import get_logger
-from utils.file_operations import open_folder
+from utils.file_operations import (
+    open_folder, place_file, replace_file, is_same_file_content, PLACEMENT_MODES, PLACEMENT_LABELS
+)
+from utils.prefix_matcher import PrefixMatcher
+from utils.folder_index import load_folder_index
+from utils.folder_layout import load_folder_layout
+from utils.dir_snapshot import iter_entries
+import config
 
 
 logger = get_logger()
@@ -20,7 +29,15 @@ class FileOrganizer:
         self.copied_files = 0
         self.skipped_files = 0
         self.unmatched_files = 0
-        self.match_length = 8  # デフォルト値
+        self.ambiguous_files = 0
+        self.error_files = 0
+        self.updated_files = 0
+        self.unchanged_files = 0
+        self.placement_counts = {}
+        self.placement_mode = config.PLACEMENT_MODE
+        self.sync_mode = False
+        self.match_mode = "auto"  # デフォルト値
+        self.match_length = 8
     
     def run(self):
         """
@@ -33,14 +50,35 @@ class FileOrganizer:
         logger.info("Step 4: ファイル振り分けを開始")
         logger.info("=" * 60)
         
-        # マッチング文字数を入力
-        match_length = self._input_match_length()
-        if match_length is None:
-            logger.info("マッチング文字数の入力がキャンセルされました")
+        # 照合方法を入力
+        match_setting = self._input_match_mode()
+        if match_setting is None:
+            logger.info("照合方法の入力がキャンセルされました")
             return False
         
-        self.match_length = match_length
-        logger.info(f"マッチング文字数: {self.match_length}文字")
+        self.match_mode, self.match_length = match_setting
+        
+        # 配置方法を入力
+        placement_mode = self._input_placement_mode()
+        if placement_mode is None:
+            logger.info("配置方法の入力がキャンセルされました")
+            return False
+        
+        self.placement_mode = placement_mode
+        logger.info(f"配置方法: {PLACEMENT_LABELS[self.placement_mode]}")
+        
+        # 既存ファイルの扱いを選択
+        self.sync_mode = messagebox.askyesno(
+            "既存ファイルの扱い",
+            "振り分け先に同じ名前のファイルがある場合、内容を比較して\n"
+            "変更されたファイルのみ置き換えますか？\n\n"
+            "（「いいえ」を選ぶと既存のファイルはすべてスキップします）"
+        )
+        if self.sync_mode:
+            compare = "サイズ・更新日時" + ("＋ダイジェスト" if config.SYNC_COMPARE_DIGEST else "")
+            logger.info(f"既存ファイル: 内容を比較して変更されたファイルのみ置き換え（{compare}）")
+        else:
+            logger.info("既存ファイル: スキップ")
         
         # ソースフォルダを選択
         source_folder = self._select_source_folder()
@@ -73,7 +111,7 @@ class FileOrganizer:
             logger.info(f"ターゲットルート: {target_root_path}")
             
             # ソースフォルダのファイル一覧を取得
-            source_files = [f for f in source_path.iterdir() if f.is_file()]
+            source_files = [source_path / entry.name for entry in iter_entries(source_path, "file")]
             logger.info(f"対象ファイル数: {len(source_files)}")
             
             if len(source_files) == 0:
@@ -81,8 +119,17 @@ class FileOrganizer:
                 logger.info("ソースフォルダにファイルがありません")
                 return False
             
-            # ターゲットフォルダ一覧を取得
-            target_folders = [d for d in target_root_path.iterdir() if d.is_dir()]
+            # ターゲットフォルダ一覧を取得（前回から変わっていなければキャッシュを使用）
+            # （Step 2 でシャード構成にした場合はシャードの下の個人フォルダを列挙）
+            layout = load_folder_layout(target_root_path)
+            if layout.sharded:
+                logger.info(f"フォルダ構成: {layout.describe()}")
+            target_folders, folder_keys, cache_hit = load_folder_index(target_root_path, config.FOLDER_INDEX_CACHE)
+            if config.FOLDER_INDEX_CACHE and not layout.sharded:
+                if cache_hit:
+                    logger.info("フォルダ索引: キャッシュを使用（前回から変更なし）")
+                else:
+                    logger.info("フォルダ索引: フォルダを列挙してキャッシュを作成")
             logger.info(f"検索対象フォルダ数: {len(target_folders)}")
             
             if len(target_folders) == 0:
@@ -90,12 +137,32 @@ class FileOrganizer:
                 logger.error("ターゲットフォルダ内にサブフォルダがありません")
                 return False
             
+            # フォルダ名の照合用索引を作成（重複するフォルダはここで検出）
+            # 照合はNFC正規化・大文字小文字を区別しないキーで行う
+            matcher = PrefixMatcher(
+                target_folders, self.match_mode, self.match_length,
+                config.PREFIX_MATCH_MIN_LENGTH, keys=folder_keys
+            )
+            self.match_length = matcher.match_length
+            match_summary = matcher.summary_lines()
+            for line in match_summary:
+                logger.info(line)
+            for key, folders in matcher.ambiguous.items():
+                logger.warning(f"照合キーの重複: {key} → {', '.join(folder.name for folder in folders)}")
+            
+            ambiguous_msg = ""
+            if matcher.ambiguous:
+                ambiguous_msg = "※ 重複するフォルダに該当するファイルはコピーしません。\n"
+            
             # 確認ダイアログ
             confirm_msg = (
                 f"以下の内容でファイルを振り分けます。\n\n"
-                f"マッチング文字数: {self.match_length}文字\n"
+                + "".join(f"{line}\n" for line in match_summary)
+                + f"配置方法: {PLACEMENT_LABELS[self.placement_mode]}\n"
+                f"既存ファイル: {'変更されたファイルのみ置き換え' if self.sync_mode else 'スキップ'}\n"
                 f"対象ファイル数: {len(source_files)}\n"
-                f"振り分け先フォルダ数: {len(target_folders)}\n\n"
+                f"振り分け先フォルダ数: {len(target_folders)}\n"
+                f"{ambiguous_msg}\n"
                 f"実行しますか？"
             )
             if not messagebox.askyesno("確認", confirm_msg):
@@ -106,64 +173,65 @@ class FileOrganizer:
             self.copied_files = 0
             self.skipped_files = 0
             self.unmatched_files = 0
+            self.ambiguous_files = 0
+            self.error_files = 0
+            self.updated_files = 0
+            self.unchanged_files = 0
+            self.placement_counts = {}
             
-            # 各ファイルを処理
-            for i, source_file in enumerate(source_files, 1):
-                file_name = source_file.name
-                
-                # ファイル名の最初のN文字を取得
-                file_prefix = file_name[:self.match_length] if len(file_name) >= self.match_length else file_name
-                
-                logger.info(f"処理中 ({i}/{len(source_files)}): {file_name} (prefix: {file_prefix})")
-                
-                # 作成したフォルダと照合
-                match_found = False
-                for target_folder in target_folders:
-                    folder_name = target_folder.name
-                    
-                    # フォルダ名の最初のN文字と比較
-                    folder_prefix = folder_name[:self.match_length] if len(folder_name) >= self.match_length else folder_name
-                    
-                    if folder_prefix == file_prefix:
-                        target_file_path = target_folder / file_name
-                        
-                        # ファイルが既に存在しない場合のみコピー
-                        if not target_file_path.exists():
-                            shutil.copy2(source_file, target_file_path)
-                            self.copied_files += 1
-                            logger.info(f"→ コピー: {file_name} → {folder_name}")
-                        else:
-                            self.skipped_files += 1
-                            logger.info(f"→ スキップ（既存）: {file_name} → {folder_name}")
-                        
-                        match_found = True
-                        break  # マッチしたら次のファイルへ
-                
-                # マッチしなかったファイルをログ出力
-                if not match_found:
-                    self.unmatched_files += 1
-                    logger.warning(f"→ マッチなし: {file_name} (prefix: {file_prefix})")
-                
-                # 進捗表示（10件ごと）
-                if i % 10 == 0:
-                    logger.info(f"進捗: {i}/{len(source_files)} ファイル処理済み")
+            # 全ファイルの振り分け先を先に決める
+            plans = [(source_file, matcher.match(source_file.name)) for source_file in source_files]
+            assignments = [
+                (source_file, target_folder)
+                for source_file, (target_folder, _, _) in plans if target_folder is not None
+            ]
+            
+            # 配置はスレッドプールで並列に行い、結果はファイルの順にログ出力する
+            workers = max(1, min(config.COPY_WORKERS, len(assignments)))
+            logger.info(f"配置の並列数: {workers}")
+            start = time.perf_counter()
+            
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(self._place_file, assignments)
+                self._log_results(plans, results, len(source_files))
+            
+            elapsed = time.perf_counter() - start
             
             logger.info("=" * 60)
             logger.info(f"ファイル振り分け完了")
-            logger.info(f"マッチング文字数: {self.match_length}文字")
-            logger.info(f"コピー: {self.copied_files}件")
-            logger.info(f"スキップ: {self.skipped_files}件")
+            logger.info(match_summary[0])
+            logger.info(f"配置: {self.copied_files + self.updated_files}件（{self._placement_breakdown()}）")
+            if self.sync_mode:
+                logger.info(f"新規: {self.copied_files}件")
+                logger.info(f"更新: {self.updated_files}件")
+                logger.info(f"変更なし: {self.unchanged_files}件")
+            else:
+                logger.info(f"スキップ: {self.skipped_files}件")
             logger.info(f"マッチなし: {self.unmatched_files}件")
+            logger.info(f"候補が複数: {self.ambiguous_files}件")
+            logger.info(f"配置失敗: {self.error_files}件")
+            logger.info(f"所要時間: {elapsed:.1f}秒")
             logger.info("=" * 60)
             
             # 結果表示
+            if self.sync_mode:
+                existing_msg = (
+                    f"　新規: {self.copied_files}件\n"
+                    f"　更新: {self.updated_files}件\n"
+                    f"変更なしのファイル: {self.unchanged_files}件\n"
+                )
+            else:
+                existing_msg = f"スキップしたファイル: {self.skipped_files}件\n"
             result_msg = (
                 f"ファイル振り分け完了!\n\n"
-                f"マッチング文字数: {self.match_length}文字\n"
+                f"{match_summary[0]}\n"
                 f"処理したファイル数: {len(source_files)}\n"
-                f"コピーしたファイル: {self.copied_files}件\n"
-                f"スキップしたファイル: {self.skipped_files}件\n"
-                f"マッチしなかったファイル: {self.unmatched_files}件"
+                f"配置したファイル: {self.copied_files + self.updated_files}件\n"
+                f"　（{self._placement_breakdown()}）\n"
+                f"{existing_msg}"
+                f"マッチしなかったファイル: {self.unmatched_files}件\n"
+                f"候補が複数のファイル: {self.ambiguous_files}件\n"
+                f"配置に失敗したファイル: {self.error_files}件"
             )
             messagebox.showinfo("完了", result_msg)
             
@@ -182,35 +250,134 @@ class FileOrganizer:
             traceback.print_exc()
             return False
     
-    def _input_match_length(self):
+    def _place_file(self, assignment):
         """
-        マッチング文字数入力ダイアログ
+        1ファイルを振り分け先フォルダに配置（ワーカースレッドで実行）
+        
+        Args:
+            assignment (tuple): (配置元ファイル, 振り分け先フォルダ)
         
         Returns:
-            int or None: 入力された文字数、キャンセル時はNone
+            tuple: (結果 "placed" / "updated" / "unchanged" / "skipped" / "error",
+                    実際の配置方法またはエラーメッセージ)
+        """
+        source_file, target_folder = assignment
+        target_file_path = target_folder / source_file.name
+        
+        try:
+            # 存在確認と比較を1回のstatで行う
+            try:
+                target_stat = os.stat(target_file_path)
+            except FileNotFoundError:
+                return "placed", place_file(source_file, target_file_path, self.placement_mode)
+            if not self.sync_mode:
+                return "skipped", None
+            
+            # 内容が変わったファイルのみ置き換える
+            if is_same_file_content(source_file, target_file_path, config.SYNC_COMPARE_DIGEST,
+                                    destination_stat=target_stat):
+                return "unchanged", None
+            return "updated", replace_file(source_file, target_file_path, self.placement_mode)
+        except Exception as e:
+            return "error", str(e)
+    
+    def _placement_breakdown(self):
+        """実際に使用した配置方法ごとの件数の表示用文字列"""
+        if not self.placement_counts:
+            return "なし"
+        return "、".join(f"{PLACEMENT_LABELS[mode]} {count}件" for mode, count in self.placement_counts.items())
+    
+    def _log_results(self, plans, results, total):
+        """
+        照合結果と配置結果をファイルの順にログ出力し、件数を集計
+        
+        Args:
+            plans (list): (コピー元ファイル, 照合結果) のリスト
+            results (iterator): 振り分け先が決まったファイルの配置結果（plansの順）
+            total (int): 対象ファイル数
+        """
+        for i, (source_file, (target_folder, candidates, file_prefix)) in enumerate(plans, 1):
+            file_name = source_file.name
+            
+            logger.info(f"処理中 ({i}/{total}): {file_name} (prefix: {file_prefix})")
+            
+            if target_folder is not None:
+                folder_name = target_folder.name
+                status, detail = next(results)
+                
+                if status in ("placed", "updated"):
+                    if status == "placed":
+                        self.copied_files += 1
+                    else:
+                        self.updated_files += 1
+                    self.placement_counts[detail] = self.placement_counts.get(detail, 0) + 1
+                    action = PLACEMENT_LABELS[detail]
+                    if self.sync_mode:
+                        action += "（更新）" if status == "updated" else "（新規）"
+                    logger.info(f"→ {action}: {file_name} → {folder_name}")
+                elif status == "unchanged":
+                    self.unchanged_files += 1
+                    logger.info(f"→ 変更なし: {file_name} → {folder_name}")
+                elif status == "skipped":
+                    self.skipped_files += 1
+                    logger.info(f"→ スキップ（既存）: {file_name} → {folder_name}")
+                else:
+                    self.error_files += 1
+                    logger.error(f"→ 配置失敗: {file_name} → {folder_name} - {detail}")
+            
+            elif candidates:
+                # 候補のフォルダが複数ある場合はコピーしない
+                self.ambiguous_files += 1
+                folder_names = ', '.join(folder.name for folder in candidates[:5])
+                if len(candidates) > 5:
+                    folder_names += f" 他{len(candidates) - 5}件"
+                logger.warning(f"→ 候補が複数: {file_name} (prefix: {file_prefix}) → {folder_names}")
+            
+            else:
+                # マッチしなかったファイルをログ出力
+                self.unmatched_files += 1
+                logger.warning(f"→ マッチなし: {file_name} (prefix: {file_prefix})")
+            
+            # 進捗表示（10件ごと）
+            if i % 10 == 0:
+                logger.info(f"進捗: {i}/{total} ファイル処理済み")
+    
+    def _input_match_mode(self):
+        """
+        照合方法入力ダイアログ
+        
+        Returns:
+            tuple or None: (照合方法, マッチング文字数)、キャンセル時はNone
         """
         root = tk.Tk()
         root.withdraw()
         
         while True:
-            match_length_str = simpledialog.askstring(
-                "マッチング文字数設定",
-                "ファイル名とフォルダ名の照合に使用する文字数を入力してください:\n\n"
-                "例:\n"
-                "- 8文字: tanaka@s と tanaka@school.jp\n"
-                "- 6文字: tanaka と tanaka@school.jp\n"
-                "- 10文字: tanaka@sch と tanaka@school.jp\n\n"
-                "推奨: 8文字（デフォルト）",
-                initialvalue="8"
+            match_mode_str = simpledialog.askstring(
+                "照合方法設定",
+                "ファイル名とフォルダ名の照合方法を入力してください:\n\n"
+                "- auto: 全フォルダを区別できる最短の文字数を自動で判定（推奨）\n"
+                "- 数値: 指定した文字数で照合\n"
+                "    例) 8文字: tanaka@s と tanaka@school.jp\n"
+                "- longest: ファイル名と最も長く一致するフォルダに照合\n"
+                "- account: ファイル名の「_」より前をアカウント名として照合\n"
+                "    例) tanaka_数学_課題_1.pdf と tanaka@school.jp\n\n"
+                "推奨: auto（デフォルト）",
+                initialvalue="auto"
             )
             
-            if match_length_str is None:
+            if match_mode_str is None:
                 # キャンセル
                 root.destroy()
                 return None
             
+            match_mode_str = match_mode_str.strip().lower()
+            if match_mode_str in ("auto", "longest", "account"):
+                root.destroy()
+                return match_mode_str, None
+            
             try:
-                match_length = int(match_length_str.strip())
+                match_length = int(match_mode_str)
                 
                 if match_length < 1:
                     messagebox.showerror(
@@ -229,16 +396,53 @@ class FileOrganizer:
                         continue
                 
                 root.destroy()
-                return match_length
+                return "fixed", match_length
                 
             except ValueError:
                 messagebox.showerror(
                     "入力エラー",
-                    "数値を入力してください。\n"
+                    "auto、longest、account または数値を入力してください。\n"
                     "例: 8"
                 )
                 continue
     
+    def _input_placement_mode(self):
+        """
+        配置方法入力ダイアログ
+        
+        Returns:
+            str or None: 配置方法、キャンセル時はNone
+        """
+        root = tk.Tk()
+        root.withdraw()
+        
+        while True:
+            placement_mode = simpledialog.askstring(
+                "配置方法設定",
+                "振り分け先フォルダへのファイルの配置方法を入力してください:\n\n"
+                "- copy: コピー（元のファイルは残す）\n"
+                "- move: 移動（元のファイルは残らない）\n"
+                "- hardlink: ハードリンク（同じドライブ内のみ、容量を使わない）\n"
+                "- reflink: copy-on-writeによる複製（対応ファイルシステムのみ）\n\n"
+                "使用できない場合は自動的にコピーします。",
+                initialvalue=config.PLACEMENT_MODE
+            )
+            
+            if placement_mode is None:
+                # キャンセル
+                root.destroy()
+                return None
+            
+            placement_mode = placement_mode.strip().lower()
+            if placement_mode in PLACEMENT_MODES:
+                root.destroy()
+                return placement_mode
+            
+            messagebox.showerror(
+                "入力エラー",
+                "copy、move、hardlink、reflink のいずれかを入力してください。"
+            )
+    
     def _select_source_folder(self):
         """ソースフォルダ選択ダイアログ"""
         root = tk.Tk()
@@ -1,16 +1,25 @@
 """
 Module2: フォルダ作成
 CSVから生徒ごとのフォルダを作成
+
+フォルダ名の重複（大文字・小文字や濁点の分離だけが異なるものを含む）は作成前にメモリ上で検出し、
+既存のフォルダは1回の列挙で取得して、存在しないフォルダのみスレッドプールで並列に作成する。
+config.FOLDER_LAYOUT でシャード構成を指定した場合は、学年・組などのサブフォルダの下に作成し、
+構成をルートフォルダの .folder_layout.json に保存する（Step 4・Step 5 はこれを読み込む）。
 """
+import time
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from utils.logger import get_logger
 from utils.csv_handler import read_csv
-from utils.unicode_normalizer import clean_foldername
+from utils.unicode_normalizer import clean_foldername, normalize_match_key
 from utils.file_operations import open_folder
+from utils.folder_layout import FolderLayout
+import config
 
 
 logger = get_logger()
@@ -21,6 +30,9 @@ class FolderCreator:
     
     def __init__(self):
         self.created_folders = 0
+        self.existing_folders = 0
+        self.error_folders = 0
+        self.duplicates = []
         self.output_folder = None
     
     def run(self):
@@ -54,12 +66,27 @@ class FolderCreator:
                 logger.error("CSVファイルの列数が不足しています")
                 return False
             
+            # フォルダ構成
+            layout = FolderLayout.from_config(config)
+            if layout.kind == "column":
+                missing_columns = [column for column in layout.columns if column not in df.columns]
+                if missing_columns:
+                    messagebox.showerror(
+                        "エラー",
+                        f"フォルダ構成に使う列がCSVにありません: {', '.join(missing_columns)}\n"
+                        f"config.FOLDER_LAYOUT_COLUMNS を確認してください。"
+                    )
+                    logger.error(f"フォルダ構成に使う列がCSVにありません: {missing_columns}")
+                    return False
+            logger.info(f"フォルダ構成: {layout.describe()}")
+            
             # E列（インデックス4）のメールアドレスを取得
-            email_column = df.iloc[:, 4]
-            folder_names = email_column.dropna().astype(str).tolist()
+            email_column = df.iloc[:, 4].fillna('').astype(str).str.strip()
             
             # 空のメールアドレスを除外
-            folder_names = [name.strip() for name in folder_names if name.strip()]
+            has_email = email_column != ''
+            folder_names = email_column[has_email].tolist()
+            shard_values = df.loc[has_email, layout.columns].values.tolist() if layout.kind == "column" else None
             
             if not folder_names:
                 messagebox.showerror("エラー", "CSVにメールアドレスのデータがありません。")
@@ -68,6 +95,14 @@ class FolderCreator:
             
             logger.info(f"対象フォルダ数: {len(folder_names)}")
             
+            # フォルダ名の重複をメモリ上で検出（作成前に報告）
+            folders, self.duplicates = self._plan_folders(folder_names, layout, shard_values)
+            logger.info(f"作成するフォルダ数（重複を除く）: {len(folders)}")
+            if self.duplicates:
+                if not self._confirm_duplicates():
+                    logger.info("ユーザーが処理をキャンセルしました")
+                    return False
+            
             # 出力先フォルダを作成
             downloads_folder = Path.home() / "Downloads"
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -76,40 +111,76 @@ class FolderCreator:
             
             logger.info(f"出力先: {self.output_folder}")
             
-            # フォルダを作成
+            # 既存のフォルダは1回の列挙で取得し、フォルダごとの存在確認を省く
+            # （大文字・小文字を区別しないドライブに合わせ、照合用のキーで比較）
+            existing_keys = {normalize_match_key(path.name) for path in layout.leaf_folders(self.output_folder)}
+            
+            # 存在しないフォルダのみスレッドプールで並列に作成し、結果はCSVの順にログ出力する
             self.created_folders = 0
-            existing_folders = 0
+            self.existing_folders = 0
+            self.error_folders = 0
+            missing = [relative for relative in folders if normalize_match_key(relative.name) not in existing_keys]
+            workers = max(1, min(config.FOLDER_CREATE_WORKERS, len(missing)))
+            logger.info(f"既存: {len(folders) - len(missing)}件、作成対象: {len(missing)}件、並列数: {workers}")
+            start = time.perf_counter()
             
-            for i, email in enumerate(folder_names, 1):
-                # フォルダ名をクリーンアップ
-                clean_email = clean_foldername(email)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # シャードのフォルダを先に作成
+                shards = sorted({relative.parent for relative in missing if relative.parent != Path(".")})
+                if shards:
+                    logger.info(f"シャードのフォルダ数: {len(shards)}")
+                    list(executor.map(self._create_shard, shards))
                 
-                if clean_email:
-                    folder_path = self.output_folder / clean_email
+                results = iter(executor.map(self._create_folder, missing))
+                missing_set = set(missing)
+                for i, relative in enumerate(folders, 1):
+                    if relative in missing_set:
+                        status, error = next(results)
+                    else:
+                        status, error = "existing", None
                     
-                    if not folder_path.exists():
-                        folder_path.mkdir(parents=True, exist_ok=True)
+                    folder_label = relative.as_posix()
+                    if status == "created":
                         self.created_folders += 1
-                        logger.info(f"作成 ({i}/{len(folder_names)}): {clean_email}")
+                        logger.info(f"作成 ({i}/{len(folders)}): {folder_label}")
+                    elif status == "existing":
+                        self.existing_folders += 1
+                        logger.info(f"既存 ({i}/{len(folders)}): {folder_label}")
                     else:
-                        existing_folders += 1
-                        logger.info(f"既存 ({i}/{len(folder_names)}): {clean_email}")
-                
-                # 進捗表示（100件ごと）
-                if i % 100 == 0:
-                    logger.info(f"進捗: {i}/{len(folder_names)} ({i/len(folder_names)*100:.0f}%)")
+                        self.error_folders += 1
+                        logger.error(f"作成失敗 ({i}/{len(folders)}): {folder_label} - {error}")
+                    
+                    # 進捗表示（100件ごと）
+                    if i % 100 == 0:
+                        logger.info(f"進捗: {i}/{len(folders)} ({i/len(folders)*100:.0f}%)")
+            
+            elapsed = time.perf_counter() - start
+            
+            # フォルダ構成を保存（Step 4・Step 5 で使用）
+            if layout.sharded:
+                layout.save(self.output_folder)
+                logger.info(f"フォルダ構成を保存しました: {layout.describe()}")
             
             logger.info("=" * 60)
             logger.info(f"フォルダ作成完了")
             logger.info(f"新規作成: {self.created_folders}件")
-            logger.info(f"既存: {existing_folders}件")
+            logger.info(f"既存: {self.existing_folders}件")
+            logger.info(f"重複（作成しない）: {len(self.duplicates)}件")
+            logger.info(f"作成失敗: {self.error_folders}件")
+            logger.info(f"所要時間: {elapsed:.1f}秒")
             logger.info("=" * 60)
             
             # 結果表示
             result_msg = (
                 f"フォルダ作成完了!\n\n"
                 f"新規作成: {self.created_folders}件\n"
-                f"既存: {existing_folders}件\n"
+                f"既存: {self.existing_folders}件\n"
+            )
+            if self.duplicates:
+                result_msg += f"重複（作成しない）: {len(self.duplicates)}件\n"
+            if self.error_folders:
+                result_msg += f"作成失敗: {self.error_folders}件（ログを確認してください）\n"
+            result_msg += (
                 f"出力先: {self.output_folder}\n\n"
                 f"次にStep1またはStep3を実行してください。"
             )
@@ -130,6 +201,94 @@ class FolderCreator:
             traceback.print_exc()
             return False
     
+    def _plan_folders(self, folder_names, layout, shard_values=None):
+        """
+        メールアドレスから作成するフォルダを決め、重複を検出
+        
+        フォルダ名として使えない文字を置換した後、照合用のキー（NFC正規化＋大文字・小文字の区別なし）が
+        同じものは同じフォルダとみなし、最初の行のみ作成する（シャードが異なる場合も重複とする）。
+        
+        Args:
+            folder_names (list): メールアドレスのリスト（CSVの順）
+            layout (FolderLayout): フォルダ構成
+            shard_values (list): 各行のシャードに使う列の値（列の構成の場合）
+        
+        Returns:
+            tuple: (作成するフォルダの出力先からの相対パスのリスト（CSVの順）,
+                    (行番号, メールアドレス, 先に出現したメールアドレス) の重複のリスト)
+        """
+        folders = []
+        first_seen = {}  # 照合用のキー → 最初に出現したメールアドレス
+        duplicates = []
+        for i, email in enumerate(folder_names, 1):
+            clean_email = clean_foldername(email)
+            if not clean_email:
+                continue
+            key = normalize_match_key(clean_email)
+            if key in first_seen:
+                duplicates.append((i, email, first_seen[key]))
+                continue
+            first_seen[key] = email
+            folders.append(layout.relative_path(email, shard_values[i - 1] if shard_values else None))
+        return folders, duplicates
+    
+    def _confirm_duplicates(self):
+        """
+        重複したメールアドレスをログに出力し、続行するか確認
+        
+        Returns:
+            bool: 続行する場合True
+        """
+        for i, email, first_email in self.duplicates:
+            if email == first_email:
+                logger.warning(f"重複 ({i}件目): {email}")
+            else:
+                logger.warning(f"重複 ({i}件目): {email}（大文字・小文字または表記の違いのみ: {first_email}）")
+        
+        examples = "\n".join(
+            email if email == first_email else f"{email} ≒ {first_email}"
+            for _, email, first_email in self.duplicates[:10]
+        )
+        more = f"\n…ほか{len(self.duplicates) - 10}件" if len(self.duplicates) > 10 else ""
+        return messagebox.askyesno(
+            "重複したメールアドレス",
+            f"重複したメールアドレスが{len(self.duplicates)}件あります"
+            f"（大文字・小文字や表記の違いのみのものを含む）:\n\n"
+            f"{examples}{more}\n\n"
+            f"重複したものは最初の1件のみフォルダを作成します。続行しますか？"
+        )
+    
+    def _create_shard(self, relative):
+        """
+        シャードのフォルダを作成（スレッドプールから呼び出す、作成できない場合は警告のみ）
+        
+        Args:
+            relative (Path): 出力先からの相対パス
+        """
+        try:
+            (self.output_folder / relative).mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"シャードのフォルダを作成できませんでした: {relative.as_posix()} - {e}")
+    
+    def _create_folder(self, relative):
+        """
+        フォルダを1つ作成（スレッドプールから呼び出す）
+        
+        Args:
+            relative (Path): 出力先からの相対パス
+        
+        Returns:
+            tuple: (結果 "created" / "existing" / "error", エラーメッセージ)
+        """
+        try:
+            (self.output_folder / relative).mkdir()
+            return "created", None
+        except FileExistsError:
+            # 列挙後に作成された、または大文字・小文字を区別しないドライブで別の表記が既存
+            return "existing", None
+        except OSError as e:
+            return "error", str(e)
+    
     def _select_csv_file(self):
         """
         CSVファイル選択ダイアログを表示
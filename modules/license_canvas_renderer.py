@@ -0,0 +1,388 @@
+"""
+Module3: ライセンスPDF作成（キャンバス描画エンジン）
+platypusを使わずにreportlabのキャンバスへ直接描画する
+"""
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from reportlab import rl_config
+from reportlab.pdfgen import canvas as pdf_canvas
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.units import mm
+from reportlab.lib.utils import simpleSplit
+
+
+# ページレイアウト（SimpleDocTemplate版と同じ配置になる値）
+PAGE_WIDTH, PAGE_HEIGHT = A4
+FRAME_PADDING = 6
+CONTENT_LEFT = 20*mm + FRAME_PADDING
+CONTENT_TOP = PAGE_HEIGHT - 25*mm - FRAME_PADDING
+CONTENT_BOTTOM = 20*mm + FRAME_PADDING
+CONTENT_WIDTH = PAGE_WIDTH - 40*mm - 2*FRAME_PADDING
+
+# タイトル・注意書き
+TITLE_TEXT = "ライセンス情報"
+TITLE_FONT_SIZE = 18
+TITLE_LEADING = 22
+TITLE_SPACE_AFTER = 6
+CAUTION_TEXT = "この情報は他の人と共有しないでください"
+CAUTION_FONT_SIZE = 10
+CAUTION_LEADING = 14
+CAUTION_SPACE_AFTER = 20
+CAUTION_COLOR = colors.HexColor('#d9534f')
+
+# 教科書見出し
+HEADING_FONT_SIZE = 14
+HEADING_LEADING = 18
+HEADING_SPACE_BEFORE = 12
+HEADING_SPACE_AFTER = 8
+HEADING_COLOR = colors.HexColor('#343a40')
+
+# 情報テーブル
+LABEL_WIDTH = 35*mm
+VALUE_WIDTH = 115*mm
+TABLE_LEFT = CONTENT_LEFT + (CONTENT_WIDTH - LABEL_WIDTH - VALUE_WIDTH) / 2
+CELL_LEADING = 16
+CELL_PADDING_VERTICAL = 3
+LABEL_PADDING_LEFT = 10
+VALUE_PADDING = 6
+LABEL_FONT = 'Helvetica'
+LABEL_FONT_SIZE = 10
+VALUE_FONT_SIZE = 11
+TABLE_BACKGROUND = colors.HexColor('#f8f9fa')
+BLOCK_SPACING = 10*mm
+
+# 発行日ボックス
+DATE_BOX_WIDTH = 35*mm
+DATE_BOX_HEIGHT = 6*mm
+DATE_BOX_X = PAGE_WIDTH - 20*mm - DATE_BOX_WIDTH
+DATE_BOX_Y = PAGE_HEIGHT - 12*mm - DATE_BOX_HEIGHT/2
+
+# 静的要素のフォーム名
+FIRST_PAGE_FORM = "license_first_page"
+LATER_PAGE_FORM = "license_later_page"
+
+
+@contextmanager
+def binary_streams():
+    """
+    ストリームのASCII85エンコードを無効にする（Flate圧縮のみ）
+    
+    reportlabはrl_config.useA85を保存時に参照するため、canvas.save()をこの中で呼ぶ。
+    """
+    previous = rl_config.useA85
+    rl_config.useA85 = 0
+    try:
+        yield
+    finally:
+        rl_config.useA85 = previous
+
+
+def draw_issue_date_box(canvas, timestamp_str):
+    """
+    右上の発行日ボックスを描画
+    
+    Args:
+        canvas: reportlabのキャンバス
+        timestamp_str (str): タイムスタンプ文字列
+    """
+    canvas.saveState()
+    
+    canvas.setFillColor(colors.HexColor('#f8f9fa'))
+    canvas.setStrokeColor(colors.HexColor('#dee2e6'))
+    canvas.setLineWidth(0.5)
+    canvas.roundRect(DATE_BOX_X, DATE_BOX_Y, DATE_BOX_WIDTH, DATE_BOX_HEIGHT, 2, fill=1, stroke=1)
+    
+    canvas.setFillColor(colors.HexColor('#6c757d'))
+    canvas.setFont('Helvetica', 8)
+    canvas.drawString(
+        DATE_BOX_X + 2*mm,
+        DATE_BOX_Y + 2*mm,
+        f"Issue Date: {timestamp_str}"
+    )
+    
+    canvas.restoreState()
+
+
+class LicenseCanvasRenderer:
+    """キャンバス直接描画によるライセンスPDF生成クラス"""
+    
+    def __init__(self, jp_font, canvas_options=None):
+        """
+        Args:
+            jp_font (str): 登録済みの日本語フォント名
+            canvas_options (dict): すべてのCanvasに渡すオプション（圧縮の指定など）
+        """
+        self.jp_font = jp_font
+        self.canvas_options = canvas_options or {}
+        self._timestamp_str = ""
+        self._info_labels = (("id", "ID:"), ("password", "PASSWORD:"), ("serial", "SERIAL CODE:"))
+    
+    def build(self, output, textbook_data, timestamp_str, **canvas_options):
+        """
+        1人分のPDFを生成
+        
+        Args:
+            output (str or file): 出力先パスまたはファイルオブジェクト
+            textbook_data (list): 教科書データ
+            timestamp_str (str): タイムスタンプ文字列
+            **canvas_options: Canvasに渡す追加オプション
+        """
+        canvas = pdf_canvas.Canvas(output, pagesize=A4, **{**self.canvas_options, **canvas_options})
+        self.define_static_forms(canvas, timestamp_str)
+        self.draw_student(canvas, textbook_data)
+        with binary_streams():
+            canvas.save()
+    
+    def define_static_forms(self, canvas, timestamp_str):
+        """
+        全ページ共通の静的要素をフォームXObjectとして定義
+        
+        1ページ目用（タイトル・注意書き・発行日）を定義し、各ページでは doForm で
+        参照するだけにする。2ページ目以降用（発行日のみ）は最初の改ページ時に定義する。
+        
+        Args:
+            canvas: reportlabのキャンバス
+            timestamp_str (str): タイムスタンプ文字列
+        """
+        self._timestamp_str = timestamp_str
+        
+        canvas.beginForm(FIRST_PAGE_FORM)
+        draw_issue_date_box(canvas, timestamp_str)
+        
+        title_top = CONTENT_TOP
+        canvas.setFillColor(colors.black)
+        canvas.setFont(self.jp_font, TITLE_FONT_SIZE)
+        canvas.drawString(CONTENT_LEFT, title_top - TITLE_FONT_SIZE, TITLE_TEXT)
+        
+        caution_top = title_top - TITLE_LEADING - TITLE_SPACE_AFTER
+        canvas.setFillColor(CAUTION_COLOR)
+        canvas.setFont(self.jp_font, CAUTION_FONT_SIZE)
+        canvas.drawString(CONTENT_LEFT, caution_top - CAUTION_FONT_SIZE, CAUTION_TEXT)
+        canvas.endForm()
+    
+    def draw_student(self, canvas, textbook_data):
+        """
+        1人分のページを描画（define_static_formsで定義済みのキャンバスに追記）
+        
+        ページ内の文字列は1つのテキストオブジェクトにまとめ、ページ確定時に描画する。
+        
+        Args:
+            canvas: reportlabのキャンバス
+            textbook_data (list): 教科書データ
+        """
+        canvas.doForm(FIRST_PAGE_FORM)
+        text = canvas.beginText()
+        y = CONTENT_TOP - TITLE_LEADING - TITLE_SPACE_AFTER - CAUTION_LEADING
+        space_after = CAUTION_SPACE_AFTER
+        at_top = False
+        
+        for data in textbook_data:
+            # 教科書見出し
+            lines = self._split_lines(f"教科書：{data['name']}", self.jp_font, HEADING_FONT_SIZE, CONTENT_WIDTH)
+            height = HEADING_LEADING * len(lines)
+            gap = 0 if at_top else max(space_after, HEADING_SPACE_BEFORE)
+            if y - gap - height < CONTENT_BOTTOM and not at_top:
+                text, y, gap = self._next_page(canvas, text), CONTENT_TOP, 0
+            y -= gap + height
+            at_top = False
+            
+            text.setFillColor(HEADING_COLOR)
+            text.setFont(self.jp_font, HEADING_FONT_SIZE)
+            self._add_lines(text, CONTENT_LEFT, y + height - HEADING_FONT_SIZE, lines, HEADING_LEADING)
+            space_after = HEADING_SPACE_AFTER
+            
+            # 情報テーブル（行単位でページをまたぐ）
+            for field, label in self._info_labels:
+                if not data[field]:
+                    continue
+                
+                value_lines = self._split_lines(data[field], self.jp_font, VALUE_FONT_SIZE, VALUE_WIDTH - 2*VALUE_PADDING)
+                row_height = CELL_LEADING * len(value_lines) + 2*CELL_PADDING_VERTICAL
+                gap = 0 if at_top else space_after
+                if y - gap - row_height < CONTENT_BOTTOM and not at_top:
+                    text, y, gap = self._next_page(canvas, text), CONTENT_TOP, 0
+                y -= gap + row_height
+                at_top = False
+                space_after = 0
+                
+                self._add_info_row(canvas, text, y, row_height, label, value_lines)
+            
+            # 教科書ブロック間の余白
+            y -= space_after + BLOCK_SPACING
+            space_after = 0
+            if y < CONTENT_BOTTOM:
+                text, y, at_top = self._next_page(canvas, text), CONTENT_TOP, True
+        
+        canvas.drawText(text)
+        canvas.showPage()
+    
+    def _next_page(self, canvas, text):
+        """
+        現在のページを確定して改ページし、2ページ目以降の静的要素を配置
+        
+        Returns:
+            新しいページ用のテキストオブジェクト
+        """
+        canvas.drawText(text)
+        canvas.showPage()
+        
+        if not canvas.hasForm(LATER_PAGE_FORM):
+            canvas.beginForm(LATER_PAGE_FORM)
+            draw_issue_date_box(canvas, self._timestamp_str)
+            canvas.endForm()
+        
+        canvas.doForm(LATER_PAGE_FORM)
+        return canvas.beginText()
+    
+    def _add_info_row(self, canvas, text, y, row_height, label, value_lines):
+        """情報テーブルの1行を追加（背景はキャンバス、文字列はテキストオブジェクトへ）"""
+        canvas.setFillColor(TABLE_BACKGROUND)
+        canvas.rect(TABLE_LEFT, y, LABEL_WIDTH + VALUE_WIDTH, row_height, stroke=0, fill=1)
+        
+        inner_height = row_height - 2*CELL_PADDING_VERTICAL
+        text.setFillColor(colors.black)
+        
+        # ラベルは行の中央に配置
+        label_bottom = y + CELL_PADDING_VERTICAL + (inner_height - CELL_LEADING) / 2
+        text.setFont(LABEL_FONT, LABEL_FONT_SIZE)
+        self._add_lines(text, TABLE_LEFT + LABEL_PADDING_LEFT, label_bottom + CELL_LEADING - LABEL_FONT_SIZE, [label], CELL_LEADING)
+        
+        text.setFont(self.jp_font, VALUE_FONT_SIZE)
+        self._add_lines(
+            text,
+            TABLE_LEFT + LABEL_WIDTH + VALUE_PADDING,
+            y + row_height - CELL_PADDING_VERTICAL - VALUE_FONT_SIZE,
+            value_lines,
+            CELL_LEADING
+        )
+    
+    def _split_lines(self, text, font_name, font_size, max_width):
+        """
+        テキストを指定幅で折り返す
+        
+        どの文字も1文字あたりフォントサイズ（全角幅）を超えないため、
+        文字数 × フォントサイズ が幅に収まる短いテキストは幅の計測を省略する。
+        """
+        if len(text) * font_size <= max_width:
+            return [text]
+        return simpleSplit(text, font_name, font_size, max_width)
+    
+    def _add_lines(self, text, x, first_baseline, lines, leading):
+        """複数行のテキストをテキストオブジェクトに追加"""
+        for i, line in enumerate(lines):
+            text.setTextOrigin(x, first_baseline - leading * i)
+            text.textOut(line)
+
+
+class PrintBatchWriter:
+    """
+    印刷用一括PDFの書き出しクラス（生徒ごとに改ページ・しおり付き）
+    
+    ReportLabのキャンバスは保存するまで冊の全ページを保持するため、使用メモリは1冊あたりの
+    生徒数に比例する（分冊しない場合は全員分）。使用メモリを抑えるにはvolume_sizeで分冊する。
+    保存時はメモリ上のバッファを介さず、一時ファイルに直接書き出してから名前を置き換える。
+    """
+    
+    def __init__(self, renderer, output_folder, base_name, timestamp_str, volume_size=0):
+        """
+        Args:
+            renderer (LicenseCanvasRenderer): 描画エンジン
+            output_folder (str): 出力先フォルダ
+            base_name (str): 出力ファイル名（拡張子なし）
+            timestamp_str (str): タイムスタンプ文字列
+            volume_size (int): 1冊あたりの生徒数（0: 分冊しない）
+        """
+        self.renderer = renderer
+        self.output_folder = Path(output_folder)
+        self.base_name = base_name
+        self.timestamp_str = timestamp_str
+        self.volume_size = volume_size
+        self.paths = []
+        self.bytes_written = 0
+        self.write_seconds = 0.0
+        self._canvas = None
+        self._file = None
+        self._volume_students = 0
+        self._keys = set()
+    
+    def add_student(self, email, textbook_data):
+        """
+        生徒1人分のページを追加（新しいページから開始し、しおりを付ける）
+        
+        Args:
+            email (str): メールアドレス（しおりの見出し）
+            textbook_data (list): 教科書データ
+        """
+        if self._canvas is None or (self.volume_size and self._volume_students >= self.volume_size):
+            self._close_volume()
+            self._open_volume()
+        
+        # 同じメールアドレスが複数行ある場合もしおりが重複しないようにする
+        key = email
+        suffix = 2
+        while key in self._keys:
+            key = f"{email}#{suffix}"
+            suffix += 1
+        self._keys.add(key)
+        
+        self._canvas.bookmarkPage(key)
+        self._canvas.addOutlineEntry(email, key, level=0)
+        self.renderer.draw_student(self._canvas, textbook_data)
+        self._volume_students += 1
+    
+    def close(self):
+        """
+        書き出し中の冊を保存して終了
+        
+        Returns:
+            list: 出力したPDFのパス
+        """
+        self._close_volume()
+        return self.paths
+    
+    def _open_volume(self):
+        """新しい冊を開始"""
+        if self.volume_size:
+            path = self.output_folder / f"{self.base_name}_{len(self.paths) + 1:02d}.pdf"
+        else:
+            path = self.output_folder / f"{self.base_name}.pdf"
+        
+        self._file = open(_temp_path(path), "wb")
+        self._canvas = pdf_canvas.Canvas(self._file, pagesize=A4, **self.renderer.canvas_options)
+        self._canvas.setTitle(path.stem)
+        self._canvas.showOutline()
+        self.renderer.define_static_forms(self._canvas, self.timestamp_str)
+        self._volume_students = 0
+        self._keys = set()
+        self.paths.append(path)
+    
+    def _close_volume(self):
+        """書き出し中の冊を一時ファイルに保存し、本来の名前に置き換える"""
+        if self._canvas is None:
+            return
+        path = self.paths[-1]
+        temp_path = _temp_path(path)
+        
+        start = time.perf_counter()
+        try:
+            with self._file:
+                with binary_streams():
+                    self._canvas.save()
+                size = self._file.tell()
+            os.replace(temp_path, path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        finally:
+            self._canvas = None
+            self._file = None
+        self.bytes_written += size
+        self.write_seconds += time.perf_counter() - start
+
+
+def _temp_path(path):
+    """保存中の冊の一時ファイルのパス（同じフォルダの隠しファイル）"""
+    return path.with_name(f".{path.name}.tmp")
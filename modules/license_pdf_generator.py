@@ -2,11 +2,20 @@
 Module3: ライセンスPDF作成
 CSVからライセンス情報PDFを生成
 """
+import io
+import os
+import time
+import json
+import hashlib
+import itertools
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, simpledialog
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.pagesizes import A4
@@ -14,31 +23,195 @@ from reportlab.lib import colors
 from reportlab.lib.units import mm
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfbase.ttfonts import TTFont
 from utils.logger import get_logger
-from utils.csv_handler import read_csv
-from utils.file_operations import get_account_name, open_folder
+from utils.csv_handler import read_csv, read_csv_chunks
+from utils.file_operations import get_account_name, open_folder, write_file_atomic
+from modules.license_canvas_renderer import LicenseCanvasRenderer, PrintBatchWriter, binary_streams, draw_issue_date_box
+import config
 
 
 logger = get_logger()
 
+JAPANESE_FONT = 'HeiseiKakuGo-W5'
+
+# コンパクト出力で埋め込む日本語フォントの登録名
+EMBEDDED_FONT = 'LicenseGothic'
+
+# 差分再生成用マニフェスト（出力先フォルダに保存）
+MANIFEST_FILENAME = ".license_manifest.json"
+MANIFEST_VERSION = 1
+
+# 描画エンジン
+PDF_ENGINES = ("platypus", "canvas")
+
+# 教科書1件あたりの列（教科書名, ID, PASSWORD, SERIAL CODE）
+TEXTBOOK_FIELDS = ("name", "id", "password", "serial")
+
+# 縦持ち形式（1行 = メールアドレス + 教科書1件）の列見出し
+LONG_FORMAT_COLUMNS = ("メールアドレス", "教科書名", "ID", "PASSWORD", "SERIAL CODE")
+
+# 並列レンダリング用ワーカープロセス内の生成インスタンス
+_worker_generator = None
+
+# オブジェクト配列の全要素に str.strip を適用するufunc
+_strip_cells = np.frompyfunc(str.strip, 1, 1)
+
+
+def extract_textbook_array(df):
+    """
+    ライセンス情報のDataFrameを配列に一括変換
+    
+    B列以降を4列セット（教科書名, ID, PASSWORD, SERIAL CODE）として
+    (生徒数 × 教科数 × 4) の配列にまとめ、前後の空白を一括で除去する。
+    4列に満たない末尾の列は無視する。
+    
+    Args:
+        df (pd.DataFrame): read_csvで読み込んだライセンス情報
+    
+    Returns:
+        tuple: (emails, fields, mask)
+            emails (np.ndarray): メールアドレス（生徒数）
+            fields (np.ndarray): 教科書データ（生徒数 × 教科数 × 4）
+            mask (np.ndarray): 教科書名が存在するスロット（生徒数 × 教科数）
+    """
+    values = df.to_numpy(dtype=object)
+    slots = max(values.shape[1] - 1, 0) // 4
+    
+    emails = _strip_cells(values[:, 0])
+    fields = _strip_cells(values[:, 1:1 + slots * 4]).reshape(len(values), slots, 4)
+    mask = fields[:, :, 0] != ""
+    
+    return emails, fields, mask
+
+
+def is_long_format(df):
+    """
+    ライセンス情報が縦持ち形式（1行1教科）か判定
+    
+    Args:
+        df (pd.DataFrame): read_csvで読み込んだライセンス情報
+    
+    Returns:
+        bool: 列見出しが縦持ち形式の場合True
+    """
+    columns = tuple(str(column).strip() for column in df.columns[:len(LONG_FORMAT_COLUMNS)])
+    return columns == LONG_FORMAT_COLUMNS
+
+
+def find_embed_font():
+    """
+    コンパクト出力で埋め込む日本語フォントを探す
+    
+    Returns:
+        Path: config.PDF_EMBED_FONT_PATHSのうち最初に見つかったフォント（なければNone）
+    """
+    for candidate in config.PDF_EMBED_FONT_PATHS:
+        font_path = Path(candidate).expanduser()
+        if font_path.is_file():
+            return font_path
+    return None
+
+
+def register_font(font_name, font_path=None):
+    """
+    日本語フォントを登録
+    
+    Args:
+        font_name (str): 登録名
+        font_path (Path): TrueTypeフォントのパス（使用した文字のみサブセット埋め込み）
+                          Noneの場合は埋め込みなしのCIDフォントとして登録
+    """
+    if font_path:
+        pdfmetrics.registerFont(TTFont(font_name, str(font_path), subfontIndex=0))
+    else:
+        pdfmetrics.registerFont(UnicodeCIDFont(font_name))
+
+
+def _init_render_worker(engine, jp_font, font_path, compact, reproducible):
+    """ワーカープロセスを初期化（日本語フォントの登録はプロセスごとに1回）"""
+    global _worker_generator
+    register_font(jp_font, font_path)
+    _worker_generator = LicensePdfGenerator(workers=1, jp_font=jp_font, engine=engine,
+                                            compact=compact, font_path=font_path, reproducible=reproducible)
+
+
+def _render_in_worker(task):
+    """ワーカープロセスで1人分のPDFをメモリ上に生成"""
+    textbook_data, timestamp_str = task
+    return _worker_generator._render_task(textbook_data, timestamp_str)
+
 
 class LicensePdfGenerator:
     """ライセンスPDF生成クラス"""
     
-    def __init__(self):
+    def __init__(self, workers=None, jp_font=None, engine=None, compact=None, font_path=None, reproducible=None):
+        """
+        Args:
+            workers (int): 並列レンダリングのプロセス数（None: config設定に従う）
+            jp_font (str): 登録済みの日本語フォント名（None: ここで登録する）
+            engine (str): 描画エンジン "platypus" / "canvas"（None: config設定に従う）
+            compact (bool): コンパクト出力にするか（None: config設定に従う）
+            font_path (Path): jp_fontの埋め込み元フォント（jp_fontがCIDフォントの場合None）
+            reproducible (bool): 同じ入力から同じバイト列のPDFを作成するか（None: config設定に従う）
+        """
         self.generated_count = 0
         self.skipped_count = 0
-        self.jp_font = self._register_japanese_font()
+        self.unchanged_count = 0
+        self.identical_count = 0
+        self.removed_count = 0
+        self.bytes_written = 0
+        self.write_seconds = 0.0
+        self.workers = workers if workers is not None else (config.PDF_RENDER_WORKERS or os.cpu_count() or 1)
+        self.engine = engine or config.PDF_ENGINE
+        if self.engine not in PDF_ENGINES:
+            raise ValueError(f"不明な描画エンジンです: {self.engine}")
+        self.compact = config.PDF_COMPACT_MODE if compact is None else compact
+        self.reproducible = config.PDF_REPRODUCIBLE if reproducible is None else reproducible
+        self.font_path = font_path
+        self.jp_font = jp_font or self._register_japanese_font()
+        self.canvas_renderer = LicenseCanvasRenderer(self.jp_font, self._canvas_options())
     
     def _register_japanese_font(self):
-        """日本語フォントを登録"""
+        """日本語フォントを登録（コンパクト出力ではサブセット埋め込みのフォントを優先）"""
+        if self.compact:
+            font_path = find_embed_font()
+            if font_path is None:
+                logger.warning("埋め込み用の日本語フォントが見つからないため、CIDフォント（埋め込みなし）を使用します")
+            else:
+                try:
+                    register_font(EMBEDDED_FONT, font_path)
+                    self.font_path = font_path
+                    logger.info(f"日本語フォント（{font_path.name}）をサブセット埋め込みで登録しました")
+                    return EMBEDDED_FONT
+                except Exception as e:
+                    logger.error(f"日本語フォント登録エラー ({font_path}): {e}")
+        
         try:
-            pdfmetrics.registerFont(UnicodeCIDFont('HeiseiKakuGo-W5'))
-            logger.info("日本語フォント（HeiseiKakuGo-W5）を登録しました")
-            return 'HeiseiKakuGo-W5'
+            pdfmetrics.registerFont(UnicodeCIDFont(JAPANESE_FONT))
+            logger.info(f"日本語フォント（{JAPANESE_FONT}）を登録しました")
+            return JAPANESE_FONT
         except Exception as e:
             logger.error(f"日本語フォント登録エラー: {e}")
-            return 'HeiseiKakuGo-W5'
+            return JAPANESE_FONT
+    
+    def _canvas_options(self):
+        """
+        Canvas・SimpleDocTemplateに渡すオプション
+        
+        コンパクト出力ではストリームを必ず圧縮し、再現可能な出力では
+        作成日時・文書IDを固定値にする（invariant）。
+        """
+        options = {}
+        if self.compact:
+            options["pageCompression"] = 1
+        if self.reproducible:
+            options["invariant"] = 1
+        return options
+    
+    def _render_mode(self):
+        """ログ・内容ハッシュ用の描画方式名"""
+        return f"{self.engine}（コンパクト）" if self.compact else self.engine
     
     def run(self):
         """
@@ -64,60 +237,63 @@ class LicensePdfGenerator:
             return False
         
         try:
-            # CSVを読み込み
-            df = read_csv(csv_path)
-            
-            if len(df) == 0:
-                messagebox.showerror("エラー", "CSVにデータがありません。")
-                logger.error("CSVにデータがありません")
-                return False
-            
-            logger.info(f"対象生徒数: {len(df)}")
+            if self._use_streaming(csv_path):
+                # 大きなCSVはチャンクごとに読み込み・生成・解放する（対象生徒数は事前に分からない）
+                logger.info(f"チャンク処理: {config.STREAMING_CHUNK_ROWS}行ごとに読み込みます")
+                batches = self._iter_entry_batches(csv_path)
+                first_batch = next(batches, None)
+                if first_batch is None:
+                    messagebox.showerror("エラー", "CSVにデータがありません。")
+                    logger.error("CSVにデータがありません")
+                    return False
+                batches = itertools.chain([first_batch], batches)
+                total = None
+            else:
+                # CSVを読み込み
+                df = read_csv(csv_path)
+                
+                if len(df) == 0:
+                    messagebox.showerror("エラー", "CSVにデータがありません。")
+                    logger.error("CSVにデータがありません")
+                    return False
+                
+                # 行ごとにスキップ理由または生成対象を記録（ログの順序を保つため）
+                logger.info(f"CSV形式: {'縦持ち（1行1教科）' if is_long_format(df) else '横持ち（1行1生徒）'}")
+                entries = self._collect_entries(df)
+                total = len(entries)
+                del df
+                batches = [entries]
+                
+                logger.info(f"対象生徒数: {total}")
             
             # タイムスタンプ
             timestamp_str = datetime.now().strftime("%Y.%m.%d")
             
-            # 各生徒のPDFを生成
+            # 出力形式を選択（生徒ごとの個別PDF / 印刷用一括PDF）
+            volume_size = None
+            if messagebox.askyesno(
+                "出力形式",
+                "印刷用に全員分を1つのPDFにまとめますか？\n\n"
+                "（「いいえ」を選ぶと生徒ごとに個別のPDFを作成します）"
+            ):
+                volume_size = self._input_volume_size()
+                if volume_size is None:
+                    logger.info("分冊人数の入力がキャンセルされました")
+                    return False
+            
             self.generated_count = 0
             self.skipped_count = 0
+            self.unchanged_count = 0
+            self.identical_count = 0
+            self.removed_count = 0
+            self.bytes_written = 0
+            self.write_seconds = 0.0
             
-            for index, row in df.iterrows():
-                email = row.iloc[0].strip() if row.iloc[0] else ""
-                
-                if not email:
-                    self.skipped_count += 1
-                    logger.warning(f"スキップ: {index+1}行目 - メールアドレスが空です")
-                    continue
-                
-                # 教科書情報を抽出
-                textbook_data = self._extract_textbook_data(row)
-                
-                if not textbook_data:
-                    self.skipped_count += 1
-                    logger.warning(f"スキップ: {email} - 有効な教科書データがありません")
-                    continue
-                
-                # PDFを生成
-                success = self._create_pdf(email, textbook_data, output_folder, timestamp_str)
-                if success:
-                    self.generated_count += 1
-                    logger.info(f"生成 ({self.generated_count}/{len(df)}): {email} ({len(textbook_data)}教科)")
-                else:
-                    self.skipped_count += 1
+            if volume_size is not None:
+                result_msg = self._generate_print_batch(batches, total, output_folder, timestamp_str, volume_size)
+            else:
+                result_msg = self._generate_individual(batches, total, output_folder, timestamp_str)
             
-            logger.info("=" * 60)
-            logger.info(f"ライセンスPDF作成完了")
-            logger.info(f"生成: {self.generated_count}件")
-            logger.info(f"スキップ: {self.skipped_count}件")
-            logger.info("=" * 60)
-            
-            # 結果表示
-            result_msg = (
-                f"ライセンスPDF作成完了!\n\n"
-                f"生成したPDF: {self.generated_count}件\n"
-                f"スキップ: {self.skipped_count}件\n"
-                f"出力先: {output_folder}"
-            )
             messagebox.showinfo("完了", result_msg)
             
             # 出力フォルダを開く
@@ -135,199 +311,805 @@ class LicensePdfGenerator:
             traceback.print_exc()
             return False
     
-    def _extract_textbook_data(self, row):
+    def _collect_long_entries(self, df, row_offset=0):
+        """
+        縦持ち形式のDataFrameをメールアドレスごとに集約
+        
+        生徒の並びは最初に現れた行の順、教科書の並びは行の順とする。
+        教科書名が空の行は無視し、教科数の上限はない。
+        
+        Args:
+            df (pd.DataFrame): 縦持ち形式のライセンス情報
+            row_offset (int): 先頭行の行番号のずれ（チャンク処理時のログ表示用）
+        
+        Returns:
+            list: (スキップ理由, メールアドレス, 教科書データ) のリスト
+        """
+        values = _strip_cells(df.iloc[:, :len(LONG_FORMAT_COLUMNS)].to_numpy(dtype=object))
+        frame = pd.DataFrame(values, columns=("email",) + TEXTBOOK_FIELDS)
+        records = values[:, 1:]
+        has_name = records[:, 0] != ""
+        
+        # メールアドレスが空の行は行ごとにスキップ
+        positioned = [
+            (index, (f"スキップ: {row_offset+index+1}行目 - メールアドレスが空です", None, None))
+            for index in np.flatnonzero(frame["email"].to_numpy() == "").tolist()
+        ]
+        
+        # メールアドレスごとの行番号を1回のgroupbyで取得
+        groups = frame.groupby("email", sort=False).indices
+        for email, rows in groups.items():
+            if not email:
+                continue
+            valid_rows = rows[has_name[rows]]
+            if len(valid_rows) == 0:
+                entry = (f"スキップ: {email} - 有効な教科書データがありません", None, None)
+            else:
+                textbook_data = [dict(zip(TEXTBOOK_FIELDS, record)) for record in records[valid_rows].tolist()]
+                entry = (None, email, textbook_data)
+            positioned.append((int(rows[0]), entry))
+        
+        positioned.sort(key=lambda item: item[0])
+        return [entry for _, entry in positioned]
+    
+    def _generate_individual(self, batches, total, output_folder, timestamp_str):
         """
-        行から教科書データを抽出
+        生徒ごとに個別のPDFを生成
         
         Args:
-            row: DataFrameの行
+            batches (iterable): _collect_entriesの結果のリスト（チャンク処理時はチャンクごと）
+            total (int): 対象生徒数（ログ表示用、チャンク処理時はNone）
+            output_folder (str): 出力先フォルダ
+            timestamp_str (str): タイムスタンプ文字列
         
         Returns:
-            list: 教科書データのリスト
+            str: 結果表示用メッセージ
         """
-        textbook_data = []
+        # 前回のマニフェストがあれば差分再生成を確認
+        manifest = self._load_manifest(output_folder)
+        incremental = False
+        if manifest:
+            incremental = messagebox.askyesno(
+                "差分再生成",
+                f"出力先に前回の生成記録（{len(manifest)}件）があります。\n\n"
+                f"内容が変わった生徒のPDFのみ再生成しますか？\n"
+                f"（「いいえ」を選ぶと全員分を再生成します）"
+            )
+        logger.info(f"生成モード: {'差分再生成' if incremental else '全件生成'}")
+        logger.info(f"描画エンジン: {self._render_mode()}")
+        if self.reproducible:
+            logger.info("再現可能な出力: 既存のPDFと同一の場合は書き込みを省略します")
+        
+        new_manifest = {}
+        with self._render_pool(total) as executor:
+            for entries in batches:
+                self._generate_batch(entries, total, output_folder, timestamp_str,
+                                     manifest, new_manifest, incremental, executor)
+        
+        # 名簿から外れた生徒のPDFを削除
+        if incremental:
+            for email in manifest.keys() - new_manifest.keys():
+                self._remove_stale_pdf(email, manifest[email], output_folder)
         
-        # B列から4列セットで処理
-        col_index = 1
-        while col_index + 3 < len(row):
-            textbook_name = row.iloc[col_index].strip() if row.iloc[col_index] else ""
-            user_id = row.iloc[col_index + 1].strip() if row.iloc[col_index + 1] else ""
-            password = row.iloc[col_index + 2].strip() if row.iloc[col_index + 2] else ""
-            serial_code = row.iloc[col_index + 3].strip() if row.iloc[col_index + 3] else ""
+        self._save_manifest(output_folder, new_manifest)
+        size_summary = self._size_summary(manifest)
+        
+        logger.info("=" * 60)
+        logger.info(f"ライセンスPDF作成完了")
+        logger.info(f"生成: {self.generated_count}件")
+        if self.reproducible:
+            logger.info(f"同一内容（書き込み省略）: {self.identical_count}件")
+        if incremental:
+            logger.info(f"変更なし: {self.unchanged_count}件")
+            logger.info(f"削除: {self.removed_count}件")
+        logger.info(f"スキップ: {self.skipped_count}件")
+        logger.info(f"書き込み: {self._write_summary()}")
+        logger.info(f"平均サイズ: {size_summary}")
+        logger.info("=" * 60)
+        
+        identical_line = f"同一内容（書き込み省略）: {self.identical_count}件\n" if self.reproducible else ""
+        if incremental:
+            return (
+                f"ライセンスPDF作成完了（差分再生成）!\n\n"
+                f"再生成したPDF: {self.generated_count}件\n"
+                f"{identical_line}"
+                f"変更なし: {self.unchanged_count}件\n"
+                f"削除したPDF: {self.removed_count}件\n"
+                f"スキップ: {self.skipped_count}件\n"
+                f"書き込み: {self._write_summary()}\n"
+                f"平均サイズ: {size_summary}\n"
+                f"出力先: {output_folder}"
+            )
+        return (
+            f"ライセンスPDF作成完了!\n\n"
+            f"生成したPDF: {self.generated_count}件\n"
+            f"{identical_line}"
+            f"スキップ: {self.skipped_count}件\n"
+            f"書き込み: {self._write_summary()}\n"
+            f"平均サイズ: {size_summary}\n"
+            f"出力先: {output_folder}"
+        )
+    
+    def _generate_batch(self, entries, total, output_folder, timestamp_str,
+                        manifest, new_manifest, incremental, executor):
+        """
+        1チャンク分の生徒のPDFを生成し、マニフェストに記録
+        
+        Args:
+            entries (list): _collect_entriesの結果
+            total (int): 対象生徒数（ログ表示用、チャンク処理時はNone）
+            output_folder (str): 出力先フォルダ
+            timestamp_str (str): タイムスタンプ文字列
+            manifest (dict): 前回のマニフェスト
+            new_manifest (dict): 今回のマニフェスト（更新される）
+            incremental (bool): 差分再生成かどうか
+            executor (ProcessPoolExecutor): 並列レンダリング用のプール（None: 人数に応じて判断）
+        """
+        # 内容ハッシュを計算し、変更のない生徒を除外
+        plans = []
+        tasks = []
+        for message, email, textbook_data in entries:
+            if message:
+                plans.append((None, False))
+                continue
             
-            # 教科書名が存在する場合のみ追加
-            if textbook_name:
-                textbook_data.append({
-                    "name": textbook_name,
-                    "id": user_id,
-                    "password": password,
-                    "serial": serial_code
-                })
+            content_hash = self._content_hash(textbook_data, timestamp_str)
+            unchanged = incremental and self._is_unchanged(manifest.get(email), content_hash, output_folder)
+            plans.append((content_hash, unchanged))
+            if not unchanged:
+                tasks.append((email, textbook_data))
+        
+        # PDFをメモリ上に生成し（結果は入力順に返る）、一定件数ごとにまとめて書き込む
+        results = self._render_pdfs(tasks, timestamp_str, executor)
+        pending = []
+        pending_documents = 0
+        for entry, plan in zip(entries, plans):
+            message, email, textbook_data = entry
+            content_hash, unchanged = plan
+            rendered = next(results) if not message and not unchanged else None
+            pending.append((entry, plan, rendered))
             
-            col_index += 4
+            if rendered is not None and rendered[0] is not None:
+                pending_documents += 1
+                if pending_documents >= config.PDF_WRITE_BATCH_SIZE:
+                    self._flush_pending(pending, total, output_folder, manifest, new_manifest)
+                    pending = []
+                    pending_documents = 0
         
-        return textbook_data
+        self._flush_pending(pending, total, output_folder, manifest, new_manifest)
     
-    def _create_pdf(self, email, textbook_data, output_folder, timestamp_str):
+    def _flush_pending(self, pending, total, output_folder, manifest, new_manifest):
         """
-        PDFファイルを生成
+        描画済みのPDFを入力順に書き込み、結果をログとマニフェストに記録
         
         Args:
-            email (str): メールアドレス
-            textbook_data (list): 教科書データ
+            pending (list): (処理内容, (内容ハッシュ, 変更なし), (PDFデータ, エラー)) のリスト
+            total (int): 対象生徒数（ログ表示用、チャンク処理時はNone）
+            output_folder (str): 出力先フォルダ
+            manifest (dict): 前回のマニフェスト
+            new_manifest (dict): 今回のマニフェスト（更新される）
+        """
+        for (message, email, textbook_data), (content_hash, unchanged), rendered in pending:
+            if message:
+                self.skipped_count += 1
+                logger.warning(message)
+                continue
+            
+            if unchanged:
+                self.unchanged_count += 1
+                new_manifest[email] = manifest[email]
+                logger.info(f"変更なし: {email}")
+                continue
+            
+            pdf_data, error = rendered
+            identical = False
+            if error is None:
+                pdf_path = Path(output_folder) / self._pdf_filename(email)
+                digest = hashlib.sha256(pdf_data).hexdigest()
+                try:
+                    identical = self.reproducible and self._has_same_digest(pdf_path, pdf_data, digest, manifest.get(email))
+                    if not identical:
+                        self._write_pdf(pdf_path, pdf_data)
+                except OSError as e:
+                    error = f"書き込みに失敗しました: {e}"
+            
+            if error is None:
+                new_manifest[email] = self._manifest_entry(email, content_hash, output_folder, digest)
+                if identical:
+                    self.identical_count += 1
+                    progress = self._progress(self.generated_count + self.identical_count, total)
+                    logger.info(f"同一内容のため書き込み省略 ({progress}): {email}")
+                else:
+                    self.generated_count += 1
+                    progress = self._progress(self.generated_count + self.identical_count, total)
+                    logger.info(f"生成 ({progress}): {email} ({len(textbook_data)}教科)")
+            else:
+                self.skipped_count += 1
+                # 前回のPDFは残し、次回の差分再生成で再度生成する（名簿から外れた生徒として削除しない）
+                if email in manifest:
+                    new_manifest[email] = manifest[email]
+                else:
+                    new_manifest.pop(email, None)
+                logger.error(f"PDF生成エラー ({email}): {error}")
+    
+    def _has_same_digest(self, pdf_path, pdf_data, digest, previous):
+        """
+        出力先の既存PDFが今回のPDFと同一か判定
+        
+        前回のマニフェストに記録したダイジェストとファイルの状態が一致すれば
+        ファイルを読まずに同一とみなし、それ以外はサイズが同じ場合のみ読んで比較する。
+        
+        Args:
+            pdf_path (Path): 出力先パス
+            pdf_data (bytes): 今回のPDFデータ
+            digest (str): 今回のPDFデータのSHA-256ハッシュ
+            previous (dict): 前回のマニフェスト項目（存在しない場合None）
+        
+        Returns:
+            bool: 同一の場合True
+        """
+        try:
+            stat = pdf_path.stat()
+        except FileNotFoundError:
+            return False
+        
+        if stat.st_size != len(pdf_data):
+            return False
+        if previous and previous.get("digest") == digest and previous.get("mtime_ns") == stat.st_mtime_ns:
+            return True
+        
+        with open(pdf_path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest() == digest
+    
+    def _write_pdf(self, pdf_path, pdf_data):
+        """PDFを一時ファイル経由で書き込み、書き込み量と時間を記録"""
+        start = time.perf_counter()
+        self.bytes_written += write_file_atomic(pdf_path, pdf_data)
+        self.write_seconds += time.perf_counter() - start
+    
+    def _size_summary(self, previous_manifest):
+        """
+        今回生成したPDFの平均サイズの表示用文字列（前回の生成記録があれば併記）
+        
+        Args:
+            previous_manifest (dict): 前回のマニフェスト
+        """
+        summary = f"{self.bytes_written // self.generated_count:,}バイト/件" if self.generated_count else "-"
+        previous_sizes = [entry.get("size", 0) for entry in previous_manifest.values()]
+        if previous_sizes:
+            summary += f"（前回 {sum(previous_sizes) // len(previous_sizes):,}バイト/件）"
+        return summary
+    
+    def _write_summary(self):
+        """書き込み量とスループットの表示用文字列"""
+        megabytes = self.bytes_written / (1024 * 1024)
+        if self.write_seconds <= 0:
+            return f"{megabytes:.1f} MB"
+        return f"{megabytes:.1f} MB（{megabytes / self.write_seconds:.1f} MB/秒）"
+    
+    def _progress(self, count, total):
+        """進捗表示用の文字列（対象生徒数が不明な場合は件数のみ）"""
+        return f"{count}/{total}" if total is not None else f"{count}"
+    
+    def _generate_print_batch(self, batches, total, output_folder, timestamp_str, volume_size):
+        """
+        全員分を印刷用の一括PDFにまとめて生成
+        
+        生徒ごとに新しいページから始め、メールアドレスのしおりを付ける。
+        キャンバスは冊を保存するまで全ページを保持するため、使用メモリは1冊あたりの生徒数に比例する
+        （分冊しない場合は全員分。使用メモリを抑えるにはvolume_sizeで分冊する）。
+        
+        Args:
+            batches (iterable): _collect_entriesの結果のリスト（チャンク処理時はチャンクごと）
+            total (int): 対象生徒数（ログ表示用、チャンク処理時はNone）
             output_folder (str): 出力先フォルダ
             timestamp_str (str): タイムスタンプ文字列
+            volume_size (int): 1冊あたりの生徒数（0: 分冊しない）
         
         Returns:
-            bool: 成功した場合True
+            str: 結果表示用メッセージ
         """
+        logger.info(f"生成モード: 印刷用一括PDF（{f'{volume_size}人ごとに分冊' if volume_size else '分冊なし'}）")
+        if not volume_size:
+            logger.info("分冊なし: 使用メモリは生徒数に比例します（大人数の場合は分冊すると1冊分に抑えられます）")
+        
+        base_name = f"ライセンス情報_印刷用_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        writer = PrintBatchWriter(self.canvas_renderer, output_folder, base_name, timestamp_str, volume_size)
+        
         try:
-            account_name = get_account_name(email)
-            pdf_filename = f"{account_name}_ライセンス情報.pdf"
-            pdf_path = Path(output_folder) / pdf_filename
+            for message, email, textbook_data in itertools.chain.from_iterable(batches):
+                if message:
+                    self.skipped_count += 1
+                    logger.warning(message)
+                    continue
+                
+                try:
+                    writer.add_student(email, textbook_data)
+                    self.generated_count += 1
+                    logger.info(f"追加 ({self._progress(self.generated_count, total)}): {email} ({len(textbook_data)}教科)")
+                except Exception as e:
+                    self.skipped_count += 1
+                    logger.error(f"PDF生成エラー ({email}): {e}")
+        finally:
+            paths = writer.close()
+            self.bytes_written = writer.bytes_written
+            self.write_seconds = writer.write_seconds
+        
+        logger.info("=" * 60)
+        logger.info(f"ライセンスPDF作成完了（印刷用一括PDF）")
+        for path in paths:
+            logger.info(f"出力: {path.name}")
+        logger.info(f"収録: {self.generated_count}件")
+        logger.info(f"スキップ: {self.skipped_count}件")
+        logger.info(f"書き込み: {self._write_summary()}")
+        logger.info("=" * 60)
+        
+        return (
+            f"ライセンスPDF作成完了（印刷用一括PDF）!\n\n"
+            f"収録した生徒: {self.generated_count}件\n"
+            f"スキップ: {self.skipped_count}件\n"
+            f"PDFファイル数: {len(paths)}\n"
+            f"書き込み: {self._write_summary()}\n"
+            f"出力先: {output_folder}"
+        )
+    
+    def _collect_entries(self, df, row_offset=0):
+        """
+        DataFrameから生徒ごとの処理内容を抽出
+        
+        Args:
+            df (pd.DataFrame): ライセンス情報（横持ち・縦持ちのどちらでも可）
+            row_offset (int): 先頭行の行番号のずれ（チャンク処理時のログ表示用）
+        
+        Returns:
+            list: (スキップ理由, メールアドレス, 教科書データ) のリスト
+                  生成対象の行はスキップ理由がNone
+        """
+        if is_long_format(df):
+            return self._collect_long_entries(df, row_offset)
+        
+        emails, fields, mask = extract_textbook_array(df)
+        has_textbook = mask.any(axis=1)
+        
+        entries = []
+        for index, email in enumerate(emails.tolist()):
+            if not email:
+                entries.append((f"スキップ: {row_offset+index+1}行目 - メールアドレスが空です", None, None))
+                continue
             
-            # PDFドキュメントを作成
-            doc = SimpleDocTemplate(
-                str(pdf_path),
-                pagesize=A4,
-                leftMargin=20*mm,
-                rightMargin=20*mm,
-                topMargin=25*mm,
-                bottomMargin=20*mm
-            )
+            if not has_textbook[index]:
+                entries.append((f"スキップ: {email} - 有効な教科書データがありません", None, None))
+                continue
             
-            story = []
-            styles = getSampleStyleSheet()
+            # 教科書名が存在するスロットのみを取り出す
+            textbook_data = [dict(zip(TEXTBOOK_FIELDS, slot)) for slot in fields[index][mask[index]].tolist()]
+            entries.append((None, email, textbook_data))
+        
+        return entries
+    
+    def _use_streaming(self, csv_path):
+        """CSVのファイルサイズからチャンク処理を使うか判定"""
+        size_mb = os.path.getsize(csv_path) / (1024 * 1024)
+        return size_mb >= config.STREAMING_MIN_CSV_MB
+    
+    def _iter_entry_batches(self, csv_path):
+        """
+        CSVをチャンクごとに読み込み、生徒ごとの処理内容を抽出
+        
+        各チャンクは抽出後に解放されるため、使用メモリは名簿の人数によらない。
+        縦持ち形式では、チャンクの末尾の生徒の行を次のチャンクに持ち越して集約する。
+        
+        Args:
+            csv_path (str): CSVファイルのパス
+        
+        Yields:
+            list: チャンクごとの (スキップ理由, メールアドレス, 教科書データ) のリスト
+        """
+        long_format = None
+        carry = None
+        read_rows = 0
+        start_row = 0
+        seen_emails = set()
+        
+        for number, chunk in enumerate(read_csv_chunks(csv_path, config.STREAMING_CHUNK_ROWS), 1):
+            if long_format is None:
+                long_format = is_long_format(chunk)
+                logger.info(f"CSV形式: {'縦持ち（1行1教科）' if long_format else '横持ち（1行1生徒）'}")
             
-            # スタイル定義
-            main_title_style = ParagraphStyle(
-                name='MainTitle',
-                parent=styles['Title'],
-                fontName=self.jp_font,
-                fontSize=18,
-                leading=22,
-                spaceAfter=6,
-                textColor=colors.black,
-                alignment=0
-            )
+            logger.info(f"チャンク {number}: {read_rows+1}〜{read_rows+len(chunk)}行目")
+            read_rows += len(chunk)
             
-            caution_style = ParagraphStyle(
-                name='Caution',
-                parent=styles['Normal'],
-                fontName=self.jp_font,
-                fontSize=10,
-                leading=14,
-                spaceAfter=20,
-                textColor=colors.HexColor('#d9534f')
-            )
+            if not long_format:
+                yield self._collect_entries(chunk, row_offset=read_rows - len(chunk))
+                continue
             
-            textbook_title_style = ParagraphStyle(
-                name='TextbookTitle',
-                parent=styles['Heading2'],
-                fontName=self.jp_font,
-                fontSize=14,
-                leading=18,
-                spaceAfter=8,
-                textColor=colors.HexColor('#343a40')
-            )
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            chunk, carry = self._split_trailing_group(chunk)
+            entries = self._collect_long_entries(chunk, row_offset=start_row)
+            start_row += len(chunk)
+            yield self._drop_repeated_students(entries, seen_emails)
+        
+        if carry is not None and len(carry) > 0:
+            entries = self._collect_long_entries(carry, row_offset=start_row)
+            yield self._drop_repeated_students(entries, seen_emails)
+    
+    def _split_trailing_group(self, chunk):
+        """
+        縦持ち形式のチャンクを、末尾の生徒の行とそれ以前に分ける
+        
+        末尾の生徒の行は次のチャンクに続いている可能性があるため持ち越す。
+        
+        Returns:
+            tuple: (今回処理する行, 持ち越す行)
+        """
+        emails = _strip_cells(chunk.iloc[:, 0].to_numpy(dtype=object))
+        boundaries = np.flatnonzero(emails != emails[-1])
+        split = int(boundaries[-1]) + 1 if len(boundaries) else 0
+        return chunk.iloc[:split], chunk.iloc[split:]
+    
+    def _drop_repeated_students(self, entries, seen_emails):
+        """
+        前のチャンクで出力済みの生徒をスキップに置き換える
+        
+        チャンク処理では、縦持ちCSVで離れた行に現れた生徒を1つのPDFに集約できない。
+        先に現れた行のPDFを上書きしないよう、後から現れた行はスキップとして報告する。
+        """
+        result = []
+        for message, email, textbook_data in entries:
+            if message is None and email in seen_emails:
+                message = f"スキップ: {email} - 行が連続していません（メールアドレス順に並べ替えてください）"
+                result.append((message, None, None))
+                continue
+            if message is None:
+                seen_emails.add(email)
+            result.append((message, email, textbook_data))
+        return result
+    
+    def _pdf_filename(self, email):
+        """生徒のPDFファイル名を取得"""
+        return f"{get_account_name(email)}_ライセンス情報.pdf"
+    
+    def _content_hash(self, textbook_data, timestamp_str):
+        """
+        PDFの内容を決める情報（教科書データ・発行日・描画方式）のハッシュを計算
+        
+        Args:
+            textbook_data (list): 教科書データ
+            timestamp_str (str): タイムスタンプ文字列
+        
+        Returns:
+            str: SHA-256ハッシュ（16進数）
+        """
+        content = [timestamp_str, self._render_mode(), [[data[field] for field in TEXTBOOK_FIELDS] for data in textbook_data]]
+        payload = json.dumps(content, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _manifest_entry(self, email, content_hash, output_folder, digest=None):
+        """生成済みPDFのマニフェスト項目を作成（digestは出力したPDFデータのハッシュ）"""
+        pdf_filename = self._pdf_filename(email)
+        stat = (Path(output_folder) / pdf_filename).stat()
+        return {
+            "hash": content_hash,
+            "file": pdf_filename,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "digest": digest,
+        }
+    
+    def _is_unchanged(self, previous, content_hash, output_folder):
+        """
+        前回生成時から内容・出力ファイルともに変わっていないか判定
+        
+        Args:
+            previous (dict): 前回のマニフェスト項目（存在しない場合None）
+            content_hash (str): 今回の内容ハッシュ
+            output_folder (str): 出力先フォルダ
+        
+        Returns:
+            bool: 再生成が不要な場合True
+        """
+        if not previous or previous.get("hash") != content_hash:
+            return False
+        
+        try:
+            stat = (Path(output_folder) / previous["file"]).stat()
+        except (OSError, KeyError):
+            return False
+        
+        return stat.st_size == previous.get("size") and stat.st_mtime_ns == previous.get("mtime_ns")
+    
+    def _remove_stale_pdf(self, email, previous, output_folder):
+        """名簿から外れた生徒のPDFを削除"""
+        pdf_path = Path(output_folder) / previous.get("file", self._pdf_filename(email))
+        try:
+            if pdf_path.exists():
+                pdf_path.unlink()
+            self.removed_count += 1
+            logger.info(f"削除: {email} ({pdf_path.name})")
+        except Exception as e:
+            logger.warning(f"PDFを削除できませんでした ({email}): {e}")
+    
+    def _load_manifest(self, output_folder):
+        """
+        出力先フォルダのマニフェストを読み込む
+        
+        Returns:
+            dict: メールアドレス → マニフェスト項目（存在しない・読めない場合は空）
+        """
+        manifest_path = Path(output_folder) / MANIFEST_FILENAME
+        if not manifest_path.exists():
+            return {}
+        
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                logger.warning("マニフェストの形式が異なるため無視します")
+                return {}
+            return data.get("students", {})
+        except Exception as e:
+            logger.warning(f"マニフェストを読み込めませんでした: {e}")
+            return {}
+    
+    def _save_manifest(self, output_folder, students):
+        """マニフェストを出力先フォルダに保存（一時ファイル経由で置き換え）"""
+        manifest_path = Path(output_folder) / MANIFEST_FILENAME
+        temp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "students": students}, f, ensure_ascii=False, indent=1)
+            os.replace(temp_path, manifest_path)
+        except Exception as e:
+            logger.warning(f"マニフェストを保存できませんでした: {e}")
+    
+    @contextmanager
+    def _render_pool(self, total):
+        """
+        チャンク処理用に、全チャンクで共有するプロセスプールを用意
+        
+        対象生徒数が分かっている場合（total指定時）はNoneを返し、
+        _render_pdfsが人数に応じてプールを作成する。
+        """
+        if total is not None or self.workers <= 1:
+            yield None
+            return
+        
+        logger.info(f"並列レンダリング: {self.workers}プロセス")
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_render_worker, initargs=self._worker_initargs()) as executor:
+            yield executor
+    
+    def _worker_initargs(self):
+        """ワーカープロセスの初期化引数（親プロセスと同じフォント・描画方式を使う）"""
+        return (self.engine, self.jp_font, self.font_path, self.compact, self.reproducible)
+    
+    def _render_pdfs(self, tasks, timestamp_str, executor=None):
+        """
+        複数生徒のPDFをメモリ上に生成（ワーカー数に応じて並列化）
+        
+        Args:
+            tasks (list): (メールアドレス, 教科書データ) のリスト
+            timestamp_str (str): タイムスタンプ文字列
+            executor (ProcessPoolExecutor): 共有のプロセスプール（None: 必要に応じて作成）
+        
+        Yields:
+            tuple: 入力順に (PDFデータ, エラーメッセージ)（成功時はエラーがNone、失敗時はデータがNone）
+        """
+        if executor is not None and tasks:
+            worker_tasks = [(textbook_data, timestamp_str) for _, textbook_data in tasks]
+            chunksize = max(1, len(worker_tasks) // (self.workers * 4))
+            yield from executor.map(_render_in_worker, worker_tasks, chunksize=chunksize)
+            return
+        
+        workers = min(self.workers, len(tasks))
+        
+        if workers <= 1 or len(tasks) < config.PDF_PARALLEL_MIN_STUDENTS:
+            for _, textbook_data in tasks:
+                yield self._render_task(textbook_data, timestamp_str)
+            return
+        
+        logger.info(f"並列レンダリング: {workers}プロセス")
+        worker_tasks = [(textbook_data, timestamp_str) for _, textbook_data in tasks]
+        chunksize = max(1, len(worker_tasks) // (workers * 4))
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker, initargs=self._worker_initargs()) as executor:
+            yield from executor.map(_render_in_worker, worker_tasks, chunksize=chunksize)
+    
+    def _render_task(self, textbook_data, timestamp_str):
+        """
+        1人分のPDFをメモリ上に生成し、結果を返す
+        
+        Returns:
+            tuple: (PDFデータ, None)、失敗時は (None, エラーメッセージ)
+        """
+        try:
+            return self._render_pdf_bytes(textbook_data, timestamp_str), None
+        except Exception as e:
+            return None, str(e)
+    
+    def _render_pdf_bytes(self, textbook_data, timestamp_str):
+        """
+        1人分のPDFをメモリ上に生成（失敗時は例外を送出）
+        
+        Args:
+            textbook_data (list): 教科書データ
+            timestamp_str (str): タイムスタンプ文字列
+        
+        Returns:
+            bytes: PDFデータ
+        """
+        buffer = io.BytesIO()
+        if self.engine == "canvas":
+            self.canvas_renderer.build(buffer, textbook_data, timestamp_str)
+        else:
+            self._build_pdf_platypus(buffer, textbook_data, timestamp_str)
+        return buffer.getvalue()
+    
+    def _build_pdf_platypus(self, output, textbook_data, timestamp_str):
+        """
+        platypus（SimpleDocTemplate）でPDFを生成
+        
+        Args:
+            output (str or file): 出力先パスまたはファイルオブジェクト
+            textbook_data (list): 教科書データ
+            timestamp_str (str): タイムスタンプ文字列
+        """
+        # PDFドキュメントを作成
+        doc = SimpleDocTemplate(
+            output,
+            pagesize=A4,
+            leftMargin=20*mm,
+            rightMargin=20*mm,
+            topMargin=25*mm,
+            bottomMargin=20*mm,
+            **self._canvas_options()
+        )
+        
+        story = []
+        styles = getSampleStyleSheet()
+        
+        # スタイル定義
+        main_title_style = ParagraphStyle(
+            name='MainTitle',
+            parent=styles['Title'],
+            fontName=self.jp_font,
+            fontSize=18,
+            leading=22,
+            spaceAfter=6,
+            textColor=colors.black,
+            alignment=0
+        )
+        
+        caution_style = ParagraphStyle(
+            name='Caution',
+            parent=styles['Normal'],
+            fontName=self.jp_font,
+            fontSize=10,
+            leading=14,
+            spaceAfter=20,
+            textColor=colors.HexColor('#d9534f')
+        )
+        
+        textbook_title_style = ParagraphStyle(
+            name='TextbookTitle',
+            parent=styles['Heading2'],
+            fontName=self.jp_font,
+            fontSize=14,
+            leading=18,
+            spaceAfter=8,
+            textColor=colors.HexColor('#343a40')
+        )
+        
+        info_label_style = ParagraphStyle(
+            name='InfoLabel',
+            parent=styles['Normal'],
+            fontSize=10,
+            leading=16,
+            textColor=colors.black,
+            fontName='Helvetica'
+        )
+        
+        info_value_style = ParagraphStyle(
+            name='InfoValue',
+            parent=styles['Normal'],
+            fontSize=11,
+            leading=16,
+            textColor=colors.black,
+            fontName=self.jp_font
+        )
+        
+        # タイトルと注意書き
+        story.append(Paragraph("ライセンス情報", main_title_style))
+        story.append(Paragraph("この情報は他の人と共有しないでください", caution_style))
+        
+        # 各教科書の情報
+        for data in textbook_data:
+            story.append(Paragraph(f"教科書：{data['name']}", textbook_title_style))
             
-            info_label_style = ParagraphStyle(
-                name='InfoLabel',
-                parent=styles['Normal'],
-                fontSize=10,
-                leading=16,
-                textColor=colors.black,
-                fontName='Helvetica'
-            )
+            info_rows = []
             
-            info_value_style = ParagraphStyle(
-                name='InfoValue',
-                parent=styles['Normal'],
-                fontSize=11,
-                leading=16,
-                textColor=colors.black,
-                fontName=self.jp_font
-            )
+            # IDがある場合
+            if data['id']:
+                info_rows.append([
+                    Paragraph("ID:", info_label_style),
+                    Paragraph(data['id'], info_value_style)
+                ])
             
-            # タイトルと注意書き
-            story.append(Paragraph("ライセンス情報", main_title_style))
-            story.append(Paragraph("この情報は他の人と共有しないでください", caution_style))
+            # パスワードがある場合
+            if data['password']:
+                info_rows.append([
+                    Paragraph("PASSWORD:", info_label_style),
+                    Paragraph(data['password'], info_value_style)
+                ])
             
-            # 各教科書の情報
-            for data in textbook_data:
-                story.append(Paragraph(f"教科書：{data['name']}", textbook_title_style))
-                
-                info_rows = []
-                
-                # IDがある場合
-                if data['id']:
-                    info_rows.append([
-                        Paragraph("ID:", info_label_style),
-                        Paragraph(data['id'], info_value_style)
-                    ])
-                
-                # パスワードがある場合
-                if data['password']:
-                    info_rows.append([
-                        Paragraph("PASSWORD:", info_label_style),
-                        Paragraph(data['password'], info_value_style)
-                    ])
-                
-                # シリアルコードがある場合
-                if data['serial']:
-                    info_rows.append([
-                        Paragraph("SERIAL CODE:", info_label_style),
-                        Paragraph(data['serial'], info_value_style)
-                    ])
-                
-                # 情報テーブル
-                if info_rows:
-                    info_table = Table(info_rows, colWidths=[35*mm, 115*mm])
-                    info_table.setStyle(TableStyle([
-                        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-                        ('BACKGROUND', (0,0), (-1,-1), colors.HexColor('#f8f9fa')),
-                        ('PADDING', (0,0), (-1,-1), 8),
-                        ('LEFTPADDING', (0,0), (0,-1), 10),
-                        ('ALIGN', (0,0), (0,-1), 'LEFT'),
-                        ('ALIGN', (1,0), (1,-1), 'LEFT'),
-                    ]))
-                    story.append(info_table)
-                
-                story.append(Spacer(1, 10*mm))
+            # シリアルコードがある場合
+            if data['serial']:
+                info_rows.append([
+                    Paragraph("SERIAL CODE:", info_label_style),
+                    Paragraph(data['serial'], info_value_style)
+                ])
+            
+            # 情報テーブル
+            if info_rows:
+                info_table = Table(info_rows, colWidths=[35*mm, 115*mm])
+                info_table.setStyle(TableStyle([
+                    ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+                    ('BACKGROUND', (0,0), (-1,-1), colors.HexColor('#f8f9fa')),
+                    ('PADDING', (0,0), (-1,-1), 8),
+                    ('LEFTPADDING', (0,0), (0,-1), 10),
+                    ('ALIGN', (0,0), (0,-1), 'LEFT'),
+                    ('ALIGN', (1,0), (1,-1), 'LEFT'),
+                ]))
+                story.append(info_table)
             
-            # PDFを生成
+            story.append(Spacer(1, 10*mm))
+        
+        # PDFを生成（コンパクト出力ではASCII85エンコードを使わない）
+        with binary_streams() if self.compact else nullcontext():
             doc.build(story, onFirstPage=lambda c, d: self._add_header(c, d, timestamp_str),
                      onLaterPages=lambda c, d: self._add_header(c, d, timestamp_str))
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"PDF生成エラー ({email}): {e}")
-            return False
     
     def _add_header(self, canvas, doc, timestamp_str):
         """PDFヘッダーを追加"""
-        canvas.saveState()
-        
-        box_width = 35*mm
-        box_height = 6*mm
-        x_position = A4[0] - 20*mm - box_width
-        y_position = A4[1] - 12*mm - box_height/2
-        
-        canvas.setFillColor(colors.HexColor('#f8f9fa'))
-        canvas.setStrokeColor(colors.HexColor('#dee2e6'))
-        canvas.setLineWidth(0.5)
-        canvas.roundRect(x_position, y_position, box_width, box_height, 2, fill=1, stroke=1)
-        
-        canvas.setFillColor(colors.HexColor('#6c757d'))
-        canvas.setFont('Helvetica', 8)
-        canvas.drawString(
-            x_position + 2*mm,
-            y_position + 2*mm,
-            f"Issue Date: {timestamp_str}"
-        )
+        draw_issue_date_box(canvas, timestamp_str)
+    
+    def _input_volume_size(self):
+        """
+        印刷用一括PDFの分冊人数入力ダイアログ
+        
+        Returns:
+            int or None: 1冊あたりの生徒数（0: 分冊しない）、キャンセル時はNone
+        """
+        root = tk.Tk()
+        root.withdraw()
         
-        canvas.restoreState()
+        while True:
+            volume_size_str = simpledialog.askstring(
+                "分冊設定",
+                "1冊あたりの生徒数を入力してください:\n\n"
+                "例:\n"
+                "- 0: 分冊しない（全員を1つのPDFにまとめる）\n"
+                "- 500: 500人ごとに別のPDFに分ける",
+                initialvalue=str(config.PRINT_BATCH_VOLUME_SIZE)
+            )
+            
+            if volume_size_str is None:
+                root.destroy()
+                return None
+            
+            try:
+                volume_size = int(volume_size_str.strip())
+                
+                if volume_size < 0:
+                    messagebox.showerror("入力エラー", "0以上の数値を入力してください。")
+                    continue
+                
+                root.destroy()
+                return volume_size
+                
+            except ValueError:
+                messagebox.showerror("入力エラー", "数値を入力してください。\n例: 500")
+                continue
     
     def _select_csv_file(self):
         """CSVファイル選択ダイアログ"""
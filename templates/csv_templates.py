@@ -121,3 +121,71 @@ class CSVTemplateGenerator:
         except Exception as e:
             logger.error(f"テンプレート保存に失敗しました: {e}")
             return False
+    
+    @staticmethod
+    def generate_step3_long_template():
+        """
+        Step3（ライセンスPDF作成）用の縦持ちCSVテンプレートを生成
+        1行に1教科分（メールアドレス + 教科書1件）を記入する形式
+        
+        Returns:
+            bool: 成功した場合True
+        """
+        # ヘッダー行のみのデータフレーム
+        df = pd.DataFrame(columns=['メールアドレス', '教科書名', 'ID', 'PASSWORD', 'SERIAL CODE'])
+        
+        # 保存先を選択
+        root = tk.Tk()
+        root.withdraw()
+        file_path = filedialog.asksaveasfilename(
+            title="Step3用CSVテンプレート（縦持ち）の保存先を選択",
+            defaultextension=".csv",
+            filetypes=[("CSV Files", "*.csv")],
+            initialfile="step3_license_pdf_long.csv"
+        )
+        
+        if not file_path:
+            logger.info("テンプレート保存がキャンセルされました")
+            return False
+        
+        try:
+            df.to_csv(file_path, index=False, encoding='utf-8-sig')
+            logger.info(f"Step3用テンプレート（縦持ち）を保存しました: {file_path}")
+            return True
+        except Exception as e:
+            logger.error(f"テンプレート保存に失敗しました: {e}")
+            return False
+    
+    @staticmethod
+    def generate_step5_template():
+        """
+        Step5（ファイル一括コピー）用の配布リストCSVテンプレートを生成
+        1行にフォルダ名（* ? のワイルドカード可）またはメールアドレスと、配布ファイル（「;」区切り）を記入する形式
+        
+        Returns:
+            bool: 成功した場合True
+        """
+        # ヘッダー行のみのデータフレーム
+        df = pd.DataFrame(columns=['フォルダ名またはメールアドレス', '配布ファイル'])
+        
+        # 保存先を選択
+        root = tk.Tk()
+        root.withdraw()
+        file_path = filedialog.asksaveasfilename(
+            title="Step5用配布リストCSVテンプレートの保存先を選択",
+            defaultextension=".csv",
+            filetypes=[("CSV Files", "*.csv")],
+            initialfile="step5_file_distribution.csv"
+        )
+        
+        if not file_path:
+            logger.info("テンプレート保存がキャンセルされました")
+            return False
+        
+        try:
+            df.to_csv(file_path, index=False, encoding='utf-8-sig')
+            logger.info(f"Step5用テンプレートを保存しました: {file_path}")
+            return True
+        except Exception as e:
+            logger.error(f"テンプレート保存に失敗しました: {e}")
+            return False
@@ -0,0 +1,75 @@
+"""
+接頭辞照合（PrefixMatcher）のテスト
+短いアカウント名（ito、abe など）のフォルダも照合でき、別の生徒のフォルダには照合しないこと
+"""
+import unittest
+from pathlib import Path
+from utils.prefix_matcher import PrefixMatcher
+
+
+FOLDER_NAMES = [
+    "ito@school.jp",
+    "abe@school.jp",
+    "suzuki@school.jp",
+    "tanaka.taro@school.jp",
+    "tanaka.toru@school.jp",
+    "oda",
+    "00000001_田中",
+]
+
+# ファイル名 → 照合されるフォルダ名（Noneはマッチなし）
+EXPECTED = {
+    "ito_数学_1.pdf": "ito@school.jp",
+    "ITO_英語.pdf": "ito@school.jp",
+    "abe.pdf": "abe@school.jp",
+    "suzuki_ライセンス情報.pdf": "suzuki@school.jp",
+    "tanaka.taro_数学.pdf": "tanaka.taro@school.jp",
+    "tanaka.toru_数学.pdf": "tanaka.toru@school.jp",
+    "oda_数学.pdf": "oda",
+    "00000001_田中_数学.pdf": "00000001_田中",
+    "itoh_数学.pdf": None,
+    "suzukiichiro_数学.pdf": None,
+    "odake_数学.pdf": None,
+}
+
+
+class PrefixMatcherShortAccountTest(unittest.TestCase):
+    """短いアカウント名のフォルダの照合"""
+    
+    def setUp(self):
+        self.folders = [Path("/root") / name for name in FOLDER_NAMES]
+    
+    def assert_matches(self, mode, expected):
+        matcher = PrefixMatcher(self.folders, mode, match_length=8, min_length=4)
+        for file_name, folder_name in expected.items():
+            with self.subTest(mode=mode, file_name=file_name):
+                folder, _, _ = matcher.match(file_name)
+                self.assertEqual(folder.name if folder else None, folder_name)
+    
+    def test_auto(self):
+        self.assert_matches("auto", EXPECTED)
+    
+    def test_longest(self):
+        self.assert_matches("longest", EXPECTED)
+    
+    def test_account(self):
+        # accountはファイル名の「_」より前で照合するため、「_」のないファイル名は対象外
+        expected = {name: folder for name, folder in EXPECTED.items() if name != "abe.pdf"}
+        self.assert_matches("account", expected)
+    
+    def test_auto_length_exceeds_short_accounts(self):
+        # 自動判定の文字数がアカウント名より長くても照合できる
+        matcher = PrefixMatcher(self.folders, "auto", min_length=4)
+        self.assertGreater(matcher.match_length, len("ito"))
+    
+    def test_same_short_account_is_ambiguous(self):
+        folders = [Path("/root/ito@a.jp"), Path("/root/ito@b.jp"), Path("/root/suzuki@a.jp")]
+        for mode in ("auto", "longest"):
+            with self.subTest(mode=mode):
+                folder, candidates, _ = PrefixMatcher(folders, mode, min_length=4).match("ito_数学.pdf")
+                self.assertIsNone(folder)
+                self.assertEqual([candidate.name for candidate in candidates], ["ito@a.jp", "ito@b.jp"])
+
+
+if __name__ == "__main__":
+    unittest.main()
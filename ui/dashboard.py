@@ -87,7 +87,8 @@ class Dashboard(ctk.CTk):
             "CSVからライセンス情報PDFを生成",
             self.run_step3,
             self.export_step3_template,
-            row=2
+            row=2,
+            long_template_command=self.export_step3_long_template
         )
         
         self._create_tool_card(
@@ -102,9 +103,9 @@ class Dashboard(ctk.CTk):
         self._create_tool_card(
             main_frame,
             "Step 5: ファイル一括コピー",
-            "1つのファイルをすべてのサブフォルダにコピー",
+            "1つのファイルをすべてのサブフォルダにコピー（配布リストCSVで複数ファイルも可）",
             self.run_step5,
-            None,
+            self.export_step5_template,
             row=4
         )
         
@@ -124,7 +125,8 @@ class Dashboard(ctk.CTk):
         )
         self.status_label.pack(pady=5)
     
-    def _create_tool_card(self, parent, title, description, run_command, template_command, row):
+    def _create_tool_card(self, parent, title, description, run_command, template_command, row,
+                          long_template_command=None):
         """ツールカードを作成"""
         card = ctk.CTkFrame(parent, fg_color="#F5F5F5", corner_radius=8)
         card.grid(row=row, column=0, pady=8, padx=10, sticky="ew")
@@ -164,6 +166,23 @@ class Dashboard(ctk.CTk):
             )
             template_btn.pack(side="left", padx=5)
         
+        # 縦持ちテンプレート出力ボタン
+        if long_template_command:
+            long_template_btn = ctk.CTkButton(
+                left_frame,
+                text="📄 縦持ち",
+                command=long_template_command,
+                width=90,
+                height=35,
+                font=("Arial", 12),
+                fg_color="#FFFFFF",
+                text_color="#212121",
+                border_width=1,
+                border_color="#E0E0E0",
+                hover_color="#EEEEEE"
+            )
+            long_template_btn.pack(side="left", padx=5)
+        
         # 右側: 説明
         right_frame = ctk.CTkFrame(card, fg_color="transparent")
         right_frame.pack(side="left", fill="x", expand=True, padx=10)
@@ -254,6 +273,12 @@ class Dashboard(ctk.CTk):
         if success:
             messagebox.showinfo("完了", "Step3用CSVテンプレートを保存しました。")
     
+    def export_step3_long_template(self):
+        """Step 3用縦持ちCSVテンプレートを出力"""
+        success = CSVTemplateGenerator.generate_step3_long_template()
+        if success:
+            messagebox.showinfo("完了", "Step3用CSVテンプレート（縦持ち）を保存しました。")
+    
     # Step 4
     def run_step4(self):
         """Step 4: ファイル振り分けを実行"""
@@ -283,3 +308,9 @@ class Dashboard(ctk.CTk):
         except Exception as e:
             logger.error(f"Step 5でエラーが発生しました: {e}")
             self.update_status("✗ Step 5 エラー", "#F44336")
+    
+    def export_step5_template(self):
+        """Step 5用配布リストCSVテンプレートを出力"""
+        success = CSVTemplateGenerator.generate_step5_template()
+        if success:
+            messagebox.showinfo("完了", "Step5用配布リストCSVテンプレートを保存しました。")
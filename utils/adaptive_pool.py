@@ -0,0 +1,165 @@
+"""
+並列数の自動調整
+処理の所要時間とスループットを観測しながら、スレッドプールの同時実行数を増減する
+
+スループット（MB/秒）が上がる間は同時実行数を1つずつ増やし、頭打ちになったら最も速かった
+同時実行数に戻す。エラーや所要時間の急増があれば同時実行数を半分に減らす。最も速かった同時実行数で
+エラーが出た場合はその記録も1つ下げ、頭打ちの判定で過負荷の同時実行数に戻らないようにする。
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class AdaptiveConcurrency:
+    """同時実行数の調整（加算的に増やし、問題があれば半分に減らす）"""
+    
+    def __init__(self, max_workers, initial=2, min_workers=1, window=8,
+                 improvement=0.05, latency_spike=3.0):
+        """
+        Args:
+            max_workers (int): 同時実行数の上限
+            initial (int): 開始時の同時実行数
+            min_workers (int): 同時実行数の下限
+            window (int): 判定に使う完了件数（同時実行数の2倍より少ない場合は2倍）
+            improvement (float): スループットが上がったとみなす比率
+            latency_spike (float): 平均所要時間がこの倍率を超えて増えたら減らす
+        """
+        self.max_workers = max(1, max_workers)
+        self.min_workers = max(1, min(min_workers, self.max_workers))
+        self.limit = max(self.min_workers, min(initial, self.max_workers))
+        self.window = window
+        self.improvement = improvement
+        self.latency_spike = latency_spike
+        
+        self.best_limit = self.limit
+        self.best_throughput = 0.0
+        self.history = []  # (同時実行数, MB/秒, 平均所要時間, エラー件数)
+        self._base_latency = None
+        self._reset_window()
+    
+    def record(self, latency, nbytes, failed=False):
+        """
+        1件の処理結果を記録し、判定に必要な件数がそろったら同時実行数を調整
+        
+        Args:
+            latency (float): 処理の所要時間（秒）
+            nbytes (int): 処理したバイト数
+            failed (bool): 処理が失敗したか
+        """
+        self._count += 1
+        self._latency += latency
+        self._bytes += nbytes
+        self._errors += 1 if failed else 0
+        if self._count >= max(self.window, self.limit * 2):
+            self._adjust()
+    
+    @property
+    def fixed(self):
+        """同時実行数が固定（調整の余地がない）か"""
+        return self.min_workers == self.max_workers
+    
+    def summary(self):
+        """調整結果の表示用文字列"""
+        if not self.history:
+            return f"{self.limit}"
+        return f"{self.best_limit}（{self.best_throughput:.1f} MB/秒）"
+    
+    def _reset_window(self):
+        self._started = time.perf_counter()
+        self._count = 0
+        self._latency = 0.0
+        self._bytes = 0
+        self._errors = 0
+    
+    def _adjust(self):
+        """直近の完了件数分の結果から同時実行数を決める"""
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        throughput = self._bytes / (1024 * 1024) / elapsed
+        mean_latency = self._latency / self._count
+        self.history.append((self.limit, throughput, mean_latency, self._errors))
+        
+        if self._base_latency is None:
+            self._base_latency = mean_latency
+        
+        if self._errors:
+            # エラーが出たら半分に減らす
+            self._back_off()
+        elif throughput >= self.best_throughput * (1 + self.improvement):
+            # 速くなった間は1つずつ増やす
+            self.best_throughput = throughput
+            self.best_limit = self.limit
+            self._base_latency = min(self._base_latency, mean_latency)
+            self.limit = min(self.max_workers, self.limit + 1)
+        elif mean_latency > self._base_latency * self.latency_spike:
+            # 速くならずに所要時間だけ急増した場合は半分に減らす
+            self._back_off()
+        else:
+            # 頭打ち: 最も速かった同時実行数に戻す
+            self.limit = self.best_limit
+        
+        self._reset_window()
+    
+    def _back_off(self):
+        """
+        同時実行数を半分に減らす
+        
+        最も速かった同時実行数（またはそれ以上）で問題が出た場合は、最も速かった同時実行数を
+        問題が出た値の1つ下にする。頭打ちの判定で戻る先が過負荷の同時実行数にならず、
+        問題が続けば1つずつ下がって問題の出ない同時実行数に収束する。
+        """
+        failed_limit = self.limit
+        self.limit = max(self.min_workers, failed_limit // 2)
+        if self.best_limit >= failed_limit:
+            self.best_limit = max(self.min_workers, failed_limit - 1)
+
+
+def run_adaptive(func, items, controller, measure):
+    """
+    同時実行数を調整しながらfuncを並列に実行し、結果をitemsの順に返す
+    
+    Args:
+        func (callable): 各要素に適用する関数（例外は送出せず、結果として返すこと）
+        items (list): 処理対象
+        controller (AdaptiveConcurrency): 同時実行数の調整
+        measure (callable): 結果から (処理したバイト数, 失敗したか) を返す関数
+    
+    Yields:
+        funcの結果（itemsの順）
+    """
+    if controller.max_workers <= 1:
+        for item in items:
+            start = time.perf_counter()
+            result = func(item)
+            nbytes, failed = measure(result)
+            controller.record(time.perf_counter() - start, nbytes, failed)
+            yield result
+        return
+    
+    def timed(item):
+        start = time.perf_counter()
+        result = func(item)
+        return result, time.perf_counter() - start
+    
+    with ThreadPoolExecutor(max_workers=controller.max_workers) as executor:
+        pending = {}
+        finished = {}
+        next_index = 0
+        next_yield = 0
+        while next_yield < len(items):
+            # 同時実行数の上限まで投入
+            while next_index < len(items) and len(pending) < controller.limit:
+                pending[executor.submit(timed, items[next_index])] = next_index
+                next_index += 1
+            
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                result, latency = future.result()
+                nbytes, failed = measure(result)
+                controller.record(latency, nbytes, failed)
+                finished[index] = result
+            
+            # 先頭から順に完了した結果を返す
+            while next_yield in finished:
+                yield finished.pop(next_yield)
+                next_yield += 1
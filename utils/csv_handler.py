@@ -1,6 +1,7 @@
 """
 CSV操作ユーティリティ
 """
+import codecs
 import pandas as pd
 from pathlib import Path
 from utils.logger import get_logger
@@ -38,6 +39,60 @@ def read_csv(csv_path, encoding='utf-8'):
         raise
 
 
+def detect_encoding(csv_path, encoding='utf-8', block_size=1024 * 1024):
+    """
+    CSVファイルのエンコーディングを判定する
+    
+    ファイル全体を読み込まずにブロック単位で逐次デコードし、
+    指定エンコーディングで読めない場合はShift-JISとみなす。
+    
+    Args:
+        csv_path (str): CSVファイルのパス
+        encoding (str): 優先するエンコーディング
+        block_size (int): 1回に読み込むバイト数
+    
+    Returns:
+        str: エンコーディング名
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        with open(csv_path, 'rb') as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    decoder.decode(b'', final=True)
+                    return encoding
+                decoder.decode(block)
+    except UnicodeDecodeError:
+        return 'shift-jis'
+
+
+def read_csv_chunks(csv_path, chunksize, encoding='utf-8'):
+    """
+    CSVファイルを指定行数ごとに読み込む
+    
+    Args:
+        csv_path (str): CSVファイルのパス
+        chunksize (int): 1回に読み込む行数
+        encoding (str): 優先するエンコーディング
+    
+    Yields:
+        pd.DataFrame: 読み込んだデータフレーム（空欄は空文字列）
+    """
+    encoding = detect_encoding(csv_path, encoding)
+    try:
+        reader = pd.read_csv(csv_path, encoding=encoding, dtype=str, chunksize=chunksize)
+        logger.info(f"CSVファイルを分割読み込みします（{encoding}、{chunksize}行ごと）: {csv_path}")
+    except Exception as e:
+        logger.error(f"CSVファイルの読み込みに失敗しました: {e}")
+        raise
+    
+    with reader:
+        for chunk in reader:
+            chunk.fillna('', inplace=True)
+            yield chunk
+
+
 def write_csv(df, csv_path, encoding='utf-8'):
     """
     データフレームをCSVファイルに書き込む
@@ -0,0 +1,77 @@
+"""
+ディレクトリスナップショット
+1回のos.scandirでフォルダの内容を取得し、エントリごとのstatを省く
+
+os.scandirが返すDirEntryはファイル・フォルダの種類を列挙時の情報から判定できるため、
+Path.iterdir()の後にis_dir()/is_file()を呼ぶ方式に比べ、エントリごとのファイルシステムへの
+問い合わせ（ネットワーク共有では往復1回）が不要になる。
+"""
+import os
+from pathlib import Path
+
+
+def iter_entries(folder, kind=None):
+    """
+    フォルダ直下のエントリを1件ずつ返す（巨大なフォルダでもメモリ使用量は一定）
+    
+    Args:
+        folder (Path or str): 対象フォルダ
+        kind (str): "file" ならファイルのみ、"dir" ならフォルダのみ、None なら両方
+    
+    Yields:
+        os.DirEntry: フォルダ直下のエントリ（列挙順）
+    """
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if kind == "file" and not entry.is_file():
+                continue
+            if kind == "dir" and not entry.is_dir():
+                continue
+            yield entry
+
+
+class DirSnapshot:
+    """
+    フォルダ直下のファイル名・フォルダ名の一覧（1回のos.scandirで作成）
+    
+    作成後にファイル・フォルダが追加・削除されても一覧は更新されない。
+    自身で作成したものは add() で反映する。
+    """
+    
+    def __init__(self, folder):
+        """
+        Args:
+            folder (Path or str): 対象フォルダ
+        """
+        self.path = Path(folder)
+        self.files = []  # ファイル名（列挙順）
+        self.dirs = []  # フォルダ名（列挙順）
+        self._names = set()  # ファイル・フォルダ以外（リンク切れ等）も含むすべての名前
+        for entry in iter_entries(self.path):
+            self._names.add(entry.name)
+            if entry.is_dir():
+                self.dirs.append(entry.name)
+            elif entry.is_file():
+                self.files.append(entry.name)
+    
+    def __contains__(self, name):
+        """ファイル・フォルダ名が存在するか"""
+        return name in self._names
+    
+    def __len__(self):
+        return len(self.files) + len(self.dirs)
+    
+    def add(self, name, is_dir=True):
+        """作成したファイル・フォルダを一覧に追加"""
+        if name in self._names:
+            return
+        self._names.add(name)
+        (self.dirs if is_dir else self.files).append(name)
+    
+    def file_paths(self):
+        """ファイルのパスのリスト（列挙順）"""
+        return [self.path / name for name in self.files]
+    
+    def dir_paths(self):
+        """フォルダのパスのリスト（列挙順）"""
+        return [self.path / name for name in self.dirs]
@@ -0,0 +1,350 @@
+"""
+ファンアウトコピー
+1つのファイルを複数のコピー先に、コピー元を1回だけ読み込んで書き込む
+
+コピー先ごとに shutil.copy2 を呼ぶとコピー元を毎回開いて読み直すが、
+このモジュールではコピー元を1回だけ開き、カーネル内コピー（copy_file_range / sendfile）で
+ページキャッシュから各コピー先へ書き込む。使えない環境ではメモリマップ（または
+メモリ上のバッファ）1つから書き込む。メタデータは copy2 と同様に shutil.copystat でコピーする。
+
+ハードリンク・reflinkを指定した場合は、コピーせずにリンク（copy-on-writeの複製）を作成し、
+作成できないコピー先には自動的にコピーする。
+
+sync_to はコピー先の既存ファイルと比較し、存在しないか内容が古い場合のみ配置する。
+"""
+import os
+import mmap
+import errno
+import time
+import shutil
+import threading
+from pathlib import Path
+from utils.file_operations import reflink_file, file_digest, is_same_file_content
+
+
+# 配置方法
+FANOUT_MODES = ("copy", "hardlink", "reflink")
+
+# コピー方式
+FANOUT_METHOD_LABELS = {
+    "copy_file_range": "カーネル内コピー（copy_file_range）",
+    "sendfile": "カーネル内コピー（sendfile）",
+    "mmap": "メモリマップ",
+    "buffer": "メモリバッファ",
+    "hardlink": "ハードリンク",
+    "reflink": "reflink",
+}
+LINK_METHODS = ("hardlink", "reflink")
+
+
+def format_throughput(nbytes, seconds):
+    """
+    書き込み量とスループットの表示用文字列
+    
+    Args:
+        nbytes (int): 書き込んだバイト数
+        seconds (float): 所要時間（秒）
+    
+    Returns:
+        str: 「12.3 MB（45.6 MB/秒）」形式の文字列
+    """
+    megabytes = nbytes / (1024 * 1024)
+    if seconds <= 0 or nbytes == 0:
+        return f"{megabytes:.1f} MB"
+    return f"{megabytes:.1f} MB（{megabytes / seconds:.1f} MB/秒）"
+
+
+def format_method_counts(method_counts):
+    """
+    コピー方式ごとの件数の表示用文字列
+    
+    Args:
+        method_counts (dict): コピー方式 → 件数
+    
+    Returns:
+        str: 「ハードリンク 10件、カーネル内コピー（copy_file_range） 2件」形式の文字列
+    """
+    if not method_counts:
+        return "なし"
+    return "、".join(f"{FANOUT_METHOD_LABELS[method]} {count}件" for method, count in method_counts.items())
+
+
+class FanoutCopier:
+    """
+    1つのコピー元ファイルを複数のコピー先へコピーするクラス
+    
+    コピー元のオフセットを明示して読み込むため、copy_to は複数スレッドから同時に呼び出せる。
+    使用後は close() するか with 文で使用する。
+    """
+    
+    def __init__(self, source, mode="copy"):
+        """
+        Args:
+            source (Path or str): コピー元ファイル
+            mode (str): 配置方法（FANOUT_MODESのいずれか）
+        """
+        if mode not in FANOUT_MODES:
+            raise ValueError(f"不明な配置方法です: {mode}")
+        
+        self.source = Path(source)
+        self.mode = mode
+        self._link_mode = mode if mode in LINK_METHODS else None
+        self._link_origin = self.source  # ハードリンクの作成元（リンク数の上限に達したら切り替える）
+        self._fd = os.open(self.source, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        self.stat = os.fstat(self._fd)
+        self.size = self.stat.st_size
+        self._digest = None
+        self._kernel_methods = [name for name in ("copy_file_range", "sendfile") if hasattr(os, name)]
+        self._verified = set()  # 1回以上成功したコピー方式
+        self._buffer = None
+        self._buffer_method = None
+        self._lock = threading.Lock()
+        
+        self.bytes_written = 0
+        self.copy_seconds = 0.0  # 最初の配置開始から最後の配置終了まで（並列時も実時間）
+        self._first_start = None
+        self.method_counts = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """コピー元ファイルとメモリマップを閉じる"""
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._buffer = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+    
+    def copy_to(self, destination):
+        """
+        コピー先へコピー（内容とメタデータ）、またはリンクを作成
+        
+        Args:
+            destination (Path or str): コピー先のファイルパス（既存の場合は置き換える）
+        
+        Returns:
+            str: 使用したコピー方式（FANOUT_METHOD_LABELSのキー）
+        """
+        start = time.perf_counter()
+        relink = False
+        if self._link_mode is not None:
+            try:
+                method = self._link(destination)
+            except OSError as e:
+                if e.errno != errno.EMLINK:
+                    raise
+                # リンク数の上限: コピーし、以後はそのコピーからリンクを作成する
+                method, relink = None, True
+            if method is not None:
+                self._record(method, 0, start)
+                return method
+        
+        try:
+            # 既存のファイルがハードリンクの場合にリンク先（コピー元など）を書き換えないよう、先に削除する
+            Path(destination).unlink(missing_ok=True)
+            with open(destination, 'wb') as dst:
+                method = self._copy_data(dst.fileno())
+            shutil.copystat(self.source, destination)
+        except BaseException:
+            # 書きかけのファイルを残さない
+            Path(destination).unlink(missing_ok=True)
+            raise
+        if relink:
+            with self._lock:
+                self._link_origin = Path(destination)
+        
+        self._record(method, self.size, start)
+        return method
+    
+    def sync_to(self, destination, compare_digest=False):
+        """
+        コピー先に存在しないか内容が古い場合のみ配置
+        
+        比較はサイズと更新日時で行い、compare_digestがTrueの場合は更新日時だけが異なるファイルの
+        ダイジェストも比較する（コピー元のダイジェストは最初の1回だけ計算）。
+        
+        Args:
+            destination (Path or str): コピー先のファイルパス
+            compare_digest (bool): 更新日時が異なる場合にダイジェストを比較するか
+        
+        Returns:
+            tuple: (結果 "new" / "updated" / "unchanged", 使用したコピー方式（unchangedの場合None）)
+        """
+        try:
+            destination_stat = os.stat(destination)
+        except FileNotFoundError:
+            return "new", self.copy_to(destination)
+        
+        if (destination_stat.st_dev, destination_stat.st_ino) == (self.stat.st_dev, self.stat.st_ino):
+            # コピー元へのハードリンク
+            return "unchanged", None
+        if is_same_file_content(self.source, destination, compare_digest,
+                                source_stat=self.stat, destination_stat=destination_stat,
+                                source_digest=self.digest() if compare_digest else None):
+            return "unchanged", None
+        return "updated", self.copy_to(destination)
+    
+    def digest(self):
+        """コピー元のSHA-256ダイジェスト（最初の呼び出しで1回だけ計算）"""
+        with self._lock:
+            if self._digest is None:
+                self._digest = file_digest(self.source)
+            return self._digest
+    
+    @property
+    def link_count(self):
+        """リンク（ハードリンク・reflink）で配置した件数"""
+        return sum(count for method, count in self.method_counts.items() if method in LINK_METHODS)
+    
+    @property
+    def copy_count(self):
+        """コピーで配置した件数"""
+        return sum(count for method, count in self.method_counts.items() if method not in LINK_METHODS)
+    
+    def summary(self):
+        """書き込み量とスループットの表示用文字列"""
+        return format_throughput(self.bytes_written, self.copy_seconds)
+    
+    def method_summary(self):
+        """使用したコピー方式ごとの件数の表示用文字列"""
+        return format_method_counts(self.method_counts)
+    
+    def _record(self, method, size, start):
+        """配置結果を集計"""
+        with self._lock:
+            if self._first_start is None or start < self._first_start:
+                self._first_start = start
+            self.bytes_written += size
+            self.copy_seconds = max(self.copy_seconds, time.perf_counter() - self._first_start)
+            self.method_counts[method] = self.method_counts.get(method, 0) + 1
+    
+    def _link(self, destination):
+        """
+        ハードリンク・reflinkを作成
+        
+        未確認の方式で作成できない場合（別のドライブ、非対応のファイルシステムなど）は、
+        以後はリンクを作成せずにコピーする。
+        
+        Returns:
+            str or None: 作成した方式、作成できなかった場合None（コピーする）
+        
+        Raises:
+            OSError: リンク数の上限（EMLINK）など、一度成功した方式での失敗
+        """
+        mode = self._link_mode
+        if mode is None:
+            return None
+        
+        destination = Path(destination)
+        try:
+            try:
+                self._create_link(mode, destination)
+            except FileExistsError:
+                # 既存のファイルは一時ファイル経由で置き換える
+                temp_path = destination.with_name(f".{destination.name}.tmp")
+                temp_path.unlink(missing_ok=True)
+                try:
+                    self._create_link(mode, temp_path)
+                    os.replace(temp_path, destination)
+                finally:
+                    # 既存のファイルが同じファイルへのハードリンクの場合、os.replaceは何もしないため削除する
+                    temp_path.unlink(missing_ok=True)
+        except OSError as e:
+            if mode in self._verified or e.errno == errno.EMLINK:
+                raise
+            self._link_mode = None
+            return None
+        
+        self._verified.add(mode)
+        return mode
+    
+    def _create_link(self, mode, path):
+        """ハードリンク・reflinkをpathに作成（pathが既存の場合はFileExistsError）"""
+        if mode == "hardlink":
+            os.link(self._link_origin, path)
+        elif reflink_file(self.source, path):
+            shutil.copystat(self.source, path)
+        else:
+            raise OSError(errno.EOPNOTSUPP, "reflinkに対応していません")
+    
+    def _copy_data(self, dst_fd):
+        """
+        コピー先のファイルディスクリプタへ内容を書き込む
+        
+        カーネル内コピーが未確認の方式で失敗した場合（途中で0バイトを返した場合を含む）は、
+        その方式を以後使わずに次の方式を試す。一度成功した方式での失敗（容量不足、コピー中の
+        コピー元の縮小など）はそのまま例外にする。
+        
+        Raises:
+            OSError: コピー元のサイズ分を書き込めなかった場合
+        """
+        for method in list(self._kernel_methods):
+            try:
+                if method == "copy_file_range":
+                    self._copy_file_range(dst_fd)
+                else:
+                    self._sendfile(dst_fd)
+                self._verified.add(method)
+                return method
+            except OSError:
+                if method in self._verified:
+                    raise
+                with self._lock:
+                    if method in self._kernel_methods:
+                        self._kernel_methods.remove(method)
+                os.ftruncate(dst_fd, 0)
+                os.lseek(dst_fd, 0, os.SEEK_SET)
+        
+        buffer, method = self._get_buffer()
+        with memoryview(buffer) as view:
+            if len(view) != self.size:
+                raise self._short_copy_error(len(view))
+            written = 0
+            while written < len(view):
+                with view[written:] as remaining:
+                    written += os.write(dst_fd, remaining)
+        return method
+    
+    def _copy_file_range(self, dst_fd):
+        """copy_file_rangeでコピー（コピー元のオフセットを明示）"""
+        offset = 0
+        while offset < self.size:
+            copied = os.copy_file_range(self._fd, dst_fd, self.size - offset, offset)
+            if copied == 0:
+                # 0を返すファイルシステムやコピー中に縮小したコピー元: 短いファイルを成功として扱わない
+                raise self._short_copy_error(offset)
+            offset += copied
+    
+    def _sendfile(self, dst_fd):
+        """sendfileでコピー（コピー元のオフセットを明示）"""
+        offset = 0
+        while offset < self.size:
+            sent = os.sendfile(dst_fd, self._fd, offset, self.size - offset)
+            if sent == 0:
+                raise self._short_copy_error(offset)
+            offset += sent
+    
+    def _short_copy_error(self, copied):
+        """コピー元のサイズ分を書き込めなかった場合の例外"""
+        return OSError(errno.EIO, f"コピーが途中で終了しました（{copied} / {self.size}バイト）", str(self.source))
+    
+    def _get_buffer(self):
+        """コピー元の内容（最初の呼び出しで1回だけメモリマップ、できない場合は読み込み）"""
+        with self._lock:
+            if self._buffer is None:
+                if self.size == 0:
+                    self._buffer, self._buffer_method = b"", "buffer"
+                else:
+                    try:
+                        self._buffer = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+                        self._buffer_method = "mmap"
+                    except (OSError, ValueError):
+                        with open(self.source, 'rb') as f:
+                            self._buffer = f.read()
+                        self._buffer_method = "buffer"
+            return self._buffer, self._buffer_method
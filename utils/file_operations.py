@@ -3,10 +3,30 @@
 """
 import os
 import sys
+import errno
+import shutil
+import hashlib
 import subprocess
 from pathlib import Path
 
 
+# ファイルの配置方法
+PLACEMENT_MODES = ("copy", "move", "hardlink", "reflink")
+PLACEMENT_LABELS = {
+    "copy": "コピー",
+    "move": "移動",
+    "move_copy": "移動（コピー後に削除）",
+    "hardlink": "ハードリンク",
+    "reflink": "reflink",
+}
+
+# 更新日時を同じとみなす差（FAT・一部のネットワーク共有は2秒単位で記録する）
+MTIME_TOLERANCE_NS = 2 * 10**9
+
+# LinuxのFICLONE ioctl（copy-on-writeによる複製）
+FICLONE = 0x40049409
+
+
 def open_folder(folder_path):
     """
     フォルダをエクスプローラー/Finderで開く
@@ -27,6 +47,198 @@ def open_folder(folder_path):
         subprocess.Popen(["xdg-open", folder_path])
 
 
+def write_file_atomic(file_path, data):
+    """
+    ファイルを一時ファイル経由で書き込む
+    
+    同じフォルダの一時ファイルに1回で書き込んでから名前を置き換えるため、
+    途中で中断しても書きかけのファイルが本来の名前で残らない。
+    
+    Args:
+        file_path (Path or str): 書き込み先のパス
+        data (bytes): 書き込む内容
+    
+    Returns:
+        int: 書き込んだバイト数
+    """
+    file_path = Path(file_path)
+    temp_path = file_path.with_name(f".{file_path.name}.tmp")
+    
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    
+    return len(data)
+
+
+def place_file(source, destination, mode="copy"):
+    """
+    ファイルを指定した方法で配置する
+    
+    指定した方法が使えない場合は自動的に代替の方法で配置する。
+    - move: 同じボリューム内はos.replace、別のボリュームへはコピー後に元ファイルを削除
+    - hardlink: ハードリンクを作成できない場合はコピー
+    - reflink: copy-on-writeに対応していないファイルシステムではコピー
+    
+    Args:
+        source (Path or str): 配置元ファイル
+        destination (Path or str): 配置先パス（存在しないこと）
+        mode (str): 配置方法（PLACEMENT_MODESのいずれか）
+    
+    Returns:
+        str: 実際に使用した配置方法（PLACEMENT_LABELSのキー）
+    """
+    if mode not in PLACEMENT_MODES:
+        raise ValueError(f"不明な配置方法です: {mode}")
+    
+    if mode == "move":
+        try:
+            os.replace(source, destination)
+            return "move"
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        shutil.copy2(source, destination)
+        os.remove(source)
+        return "move_copy"
+    
+    if mode == "hardlink":
+        try:
+            os.link(source, destination)
+            return "hardlink"
+        except FileExistsError:
+            raise
+        except OSError:
+            pass
+    
+    elif mode == "reflink":
+        if reflink_file(source, destination):
+            shutil.copystat(source, destination)
+            return "reflink"
+    
+    shutil.copy2(source, destination)
+    return "copy"
+
+
+def reflink_file(source, destination):
+    """
+    copy-on-writeでファイルを複製（Linux: FICLONE、macOS: clonefile）
+    
+    Returns:
+        bool: 複製できた場合True、ファイルシステムが対応していない場合False
+    """
+    if sys.platform.startswith("linux"):
+        import fcntl
+        with open(source, 'rb') as src, open(destination, 'xb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                return True
+            except OSError:
+                pass
+        os.remove(destination)
+        return False
+    
+    if sys.platform == "darwin":
+        import ctypes
+        import ctypes.util
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            clonefile = libc.clonefile
+        except (OSError, AttributeError):
+            return False
+        if clonefile(os.fsencode(source), os.fsencode(destination), 0) == 0:
+            return True
+        if ctypes.get_errno() == errno.EEXIST:
+            raise FileExistsError(errno.EEXIST, "ファイルが既に存在します", str(destination))
+        return False
+    
+    return False
+
+
+def replace_file(source, destination, mode="copy"):
+    """
+    既存のファイルを配置元の内容で置き換える
+    
+    同じフォルダの一時ファイルに配置してから名前を置き換えるため、
+    途中で失敗しても既存のファイルは壊れない。
+    
+    Args:
+        source (Path or str): 配置元ファイル
+        destination (Path or str): 置き換えるファイル
+        mode (str): 配置方法（PLACEMENT_MODESのいずれか）
+    
+    Returns:
+        str: 実際に使用した配置方法（PLACEMENT_LABELSのキー）
+    """
+    destination = Path(destination)
+    temp_path = destination.with_name(f".{destination.name}.tmp")
+    
+    try:
+        temp_path.unlink(missing_ok=True)
+        used_mode = place_file(source, temp_path, mode)
+        os.replace(temp_path, destination)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    
+    return used_mode
+
+
+def file_digest(file_path, block_size=1024 * 1024):
+    """
+    ファイルのSHA-256ダイジェストをブロックごとに読み込んで計算
+    
+    Args:
+        file_path (Path or str): ファイルのパス
+        block_size (int): 1回に読み込むバイト数
+    
+    Returns:
+        str: ダイジェスト（16進数）
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_same_file_content(source, destination, compare_digest=False, source_stat=None, destination_stat=None,
+                         source_digest=None):
+    """
+    配置先のファイルが配置元と同じ内容か判定
+    
+    サイズが異なれば異なる、サイズと更新日時（MTIME_TOLERANCE_NS以内の差は同じとみなす）が
+    同じなら同じと判定する。
+    サイズが同じで更新日時だけが異なる場合は、compare_digestがTrueならダイジェストを比較し、
+    Falseなら異なると判定する。
+    
+    Args:
+        source (Path or str): 配置元ファイル
+        destination (Path or str): 配置先ファイル
+        compare_digest (bool): 更新日時が異なる場合にダイジェストを比較するか
+        source_stat (os.stat_result): 配置元のstat結果（取得済みの場合）
+        destination_stat (os.stat_result): 配置先のstat結果（取得済みの場合）
+        source_digest (str): 配置元のダイジェスト（計算済みの場合）
+    
+    Returns:
+        bool: 同じ内容と判定した場合True
+    """
+    source_stat = source_stat or os.stat(source)
+    destination_stat = destination_stat or os.stat(destination)
+    
+    if source_stat.st_size != destination_stat.st_size:
+        return False
+    if abs(source_stat.st_mtime_ns - destination_stat.st_mtime_ns) <= MTIME_TOLERANCE_NS:
+        return True
+    if not compare_digest:
+        return False
+    return (source_digest or file_digest(source)) == file_digest(destination)
+
+
 def get_file_extension(filename):
     """
     ファイルの拡張子を取得
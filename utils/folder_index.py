@@ -0,0 +1,126 @@
+"""
+フォルダ索引キャッシュ
+個人フォルダ群のルートにサブフォルダ名と照合用キーの一覧を保存し、繰り返しの振り分けで再列挙を省く
+"""
+import os
+import json
+from pathlib import Path
+from utils.logger import get_logger
+from utils.dir_snapshot import iter_entries
+from utils.folder_layout import load_folder_layout
+from utils.unicode_normalizer import normalize_match_key
+
+
+logger = get_logger()
+
+
+INDEX_CACHE_FILENAME = ".folder_index.json"
+INDEX_CACHE_VERSION = 3
+
+
+def load_folder_index(root, use_cache=True):
+    """
+    ルートフォルダ直下のサブフォルダ一覧と照合用キーを取得（キャッシュがあれば利用）
+    
+    キャッシュはルートフォルダの更新日時とリンク数が保存時と一致する場合のみ使用する。
+    判定はルートフォルダ1回のstatだけで行い、キャッシュが有効ならルートの列挙と照合用キーの作成を省ける
+    （フォルダの追加・削除・名前の変更ではルートの更新日時が変わる。リンク数はサブフォルダ数を反映する
+    ファイルシステムでのみ判定の補強になる）。
+    ルートにフォルダ構成ファイル（シャード構成）がある場合は、シャードの下の個人フォルダを列挙する
+    （シャード内の変更はルートの更新日時に表れないため、キャッシュは使用しない）。
+    
+    Args:
+        root (Path or str): 個人フォルダ群のルートフォルダ
+        use_cache (bool): キャッシュを読み書きするか
+    
+    Returns:
+        tuple: (サブフォルダ（Path）のリスト（名前順）, 照合用キーのリスト, キャッシュを使用した場合True)
+    """
+    root = Path(root)
+    cache_path = root / INDEX_CACHE_FILENAME
+    
+    layout = load_folder_layout(root)
+    if layout.sharded:
+        folders = sorted(layout.leaf_folders(root), key=lambda folder: folder.name)
+        return folders, [normalize_match_key(folder.name) for folder in folders], False
+    
+    if use_cache:
+        cached = _read_cache(cache_path)
+        if cached is not None:
+            mtime_ns, nlink = _root_state(root)
+            if cached.get("mtime_ns") == mtime_ns and cached.get("nlink") == nlink:
+                folders = cached.get("folders", [])
+                return [root / name for name, _ in folders], [key for _, key in folders], True
+    
+    # 列挙中にフォルダが追加された場合に古い一覧が有効とみなされないよう、状態は列挙の前に記録する
+    state = _prepare_cache(root, cache_path) if use_cache else None
+    
+    names = sorted(entry.name for entry in iter_entries(root, "dir"))
+    keys = [normalize_match_key(name) for name in names]
+    
+    if state is not None:
+        _write_cache(cache_path, state, list(zip(names, keys)))
+    
+    return [root / name for name in names], keys, False
+
+
+def _root_state(root):
+    """キャッシュの有効性判定に使うルートフォルダの更新日時（ns）とリンク数（列挙はしない）"""
+    stat = os.stat(root)
+    return stat.st_mtime_ns, stat.st_nlink
+
+
+def _read_cache(cache_path):
+    """キャッシュファイルを読み込む（存在しない・形式が異なる場合はNone）"""
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != INDEX_CACHE_VERSION:
+        return None
+    return data
+
+
+def _prepare_cache(root, cache_path):
+    """
+    キャッシュファイルを作成し、ルートフォルダの状態を記録する（列挙の前に呼ぶ）
+    
+    キャッシュファイルの作成自体でルートの更新日時が変わるため、先にファイルを作成してから
+    状態を記録する。列挙より後に変更があれば保存した状態と一致せず、次回は再列挙になる。
+    
+    Returns:
+        tuple or None: (更新日時（ns）, リンク数)、作成できない場合はNone（警告のみ）
+    """
+    try:
+        cache_path.touch(exist_ok=True)
+        return _root_state(root)
+    except OSError as e:
+        logger.warning(f"フォルダ索引のキャッシュを保存できませんでした: {e}")
+        return None
+
+
+def _write_cache(cache_path, state, folders):
+    """
+    キャッシュファイルを保存（書き込めない場合は警告のみ）
+    
+    内容は _prepare_cache で作成した既存ファイルへの上書きで書き込む
+    （既存ファイルの上書きではルートの更新日時は変わらない）。
+    
+    Args:
+        cache_path (Path): キャッシュファイルのパス
+        state (tuple): 列挙前に記録したルートフォルダの (更新日時（ns）, リンク数)
+        folders (list): (フォルダ名, 照合用キー) のリスト
+    """
+    mtime_ns, nlink = state
+    try:
+        data = {
+            "version": INDEX_CACHE_VERSION,
+            "mtime_ns": mtime_ns,
+            "nlink": nlink,
+            "folders": folders,
+        }
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+    except OSError as e:
+        logger.warning(f"フォルダ索引のキャッシュを保存できませんでした: {e}")
@@ -0,0 +1,251 @@
+"""
+フォルダ構成（シャーディング）
+個人フォルダを学年・組の列、またはアカウント名のハッシュ・先頭文字ごとのサブフォルダに分けて配置する
+
+Step 2 は構成をルートフォルダの .folder_layout.json に保存し、Step 4・Step 5 はこれを読み込んで
+シャードの下の個人フォルダを対象にする（構成ファイルがなければ従来どおりルート直下）。
+ハッシュ・先頭文字の構成ではメールアドレスからシャードを計算でき、列の構成ではメールアドレスごとの
+シャードを構成ファイルに保存するため、いずれも全シャードを列挙せずに個人フォルダを特定できる。
+"""
+import json
+import hashlib
+from pathlib import Path
+from utils.logger import get_logger
+from utils.dir_snapshot import DirSnapshot, iter_entries
+from utils.file_operations import get_account_name
+from utils.unicode_normalizer import clean_foldername, normalize_match_key
+
+
+logger = get_logger()
+
+
+LAYOUT_FILENAME = ".folder_layout.json"
+LAYOUT_VERSION = 1
+
+# 構成の種類
+LAYOUT_TYPES = ("flat", "column", "hash", "prefix")
+LAYOUT_LABELS = {
+    "flat": "ルート直下",
+    "column": "列の値ごと",
+    "hash": "アカウント名のハッシュごと",
+    "prefix": "アカウント名の先頭文字ごと",
+}
+
+# 列の値が空の場合のシャード名
+EMPTY_SHARD_NAME = "未分類"
+
+
+class FolderLayout:
+    """個人フォルダの配置構成"""
+    
+    def __init__(self, kind="flat", depth=1, width=2, columns=None, assignments=None):
+        """
+        Args:
+            kind (str): 構成の種類（LAYOUT_TYPESのいずれか）
+            depth (int): シャードの階層数（hash / prefix、columnの場合は列の数）
+            width (int): 1階層あたりの文字数（hash / prefix）
+            columns (list): シャードに使う列名（column）
+            assignments (dict): 照合用キー → ルートからの相対パス（column、保存済みの割り当て）
+        """
+        if kind not in LAYOUT_TYPES:
+            raise ValueError(f"不明なフォルダ構成です: {kind}")
+        
+        self.kind = kind
+        self.columns = list(columns or [])
+        if kind == "flat":
+            self.depth = 0
+        elif kind == "column":
+            if not self.columns:
+                raise ValueError("列の構成にはシャードに使う列名が必要です")
+            self.depth = len(self.columns)
+        else:
+            self.depth = max(1, int(depth))
+        self.width = max(1, int(width))
+        self.assignments = dict(assignments or {})
+    
+    @classmethod
+    def from_config(cls, config):
+        """設定（config.FOLDER_LAYOUT_*）から作成"""
+        return cls(
+            config.FOLDER_LAYOUT,
+            depth=config.FOLDER_LAYOUT_DEPTH,
+            width=config.FOLDER_LAYOUT_WIDTH,
+            columns=config.FOLDER_LAYOUT_COLUMNS,
+        )
+    
+    @property
+    def sharded(self):
+        """シャードに分けて配置するか"""
+        return self.depth > 0
+    
+    def describe(self):
+        """構成の表示用文字列"""
+        label = LAYOUT_LABELS[self.kind]
+        if self.kind == "column":
+            return f"{label}（{' / '.join(self.columns)}）"
+        if self.kind in ("hash", "prefix"):
+            return f"{label}（{self.depth}階層、{self.width}文字）"
+        return label
+    
+    def relative_path(self, email, values=None):
+        """
+        個人フォルダのルートからの相対パスを決める（Step 2で作成時に使用）
+        
+        列の構成では割り当てを記録し、save() で構成ファイルに保存する。
+        
+        Args:
+            email (str): メールアドレス
+            values (list): シャードに使う列の値（column、columnsの順）
+        
+        Returns:
+            Path: ルートからの相対パス
+        """
+        folder_name = clean_foldername(email)
+        if self.kind == "column":
+            parts = [_shard_name(value) for value in (values or [])][:self.depth]
+            parts += [EMPTY_SHARD_NAME] * (self.depth - len(parts))
+            relative = Path(*parts, folder_name)
+            self.assignments[normalize_match_key(folder_name)] = relative.as_posix()
+            return relative
+        return Path(*self._computed_shard(folder_name), folder_name)
+    
+    def folder_for(self, root, email):
+        """
+        メールアドレスから個人フォルダのパスを求める（全シャードを列挙しない）
+        
+        ハッシュ・先頭文字の構成ではシャードを計算し、フォルダ名の大文字・小文字が異なる場合は
+        そのシャードのみ列挙して探す。
+        
+        Args:
+            root (Path or str): 個人フォルダ群のルートフォルダ
+            email (str): メールアドレス（またはフォルダ名）
+        
+        Returns:
+            Path or None: 個人フォルダのパス、見つからない場合はNone
+        """
+        root = Path(root)
+        folder_name = clean_foldername(email)
+        key = normalize_match_key(folder_name)
+        
+        if self.kind == "column":
+            relative = self.assignments.get(key)
+            return root / relative if relative is not None else None
+        
+        shard = root.joinpath(*self._computed_shard(folder_name))
+        folder = shard / folder_name
+        if folder.is_dir():
+            return folder
+        try:
+            for entry in iter_entries(shard, "dir"):
+                if normalize_match_key(entry.name) == key:
+                    return shard / entry.name
+        except FileNotFoundError:
+            pass
+        return None
+    
+    def leaf_folders(self, root):
+        """
+        すべての個人フォルダ（シャードの下の階層）を列挙
+        
+        Args:
+            root (Path or str): 個人フォルダ群のルートフォルダ
+        
+        Returns:
+            list: 個人フォルダ（Path）のリスト
+        """
+        shards = [Path(root)]
+        for _ in range(self.depth):
+            shards = [
+                shard / entry.name
+                for shard in shards
+                for entry in iter_entries(shard, "dir") if not entry.name.startswith(".")
+            ]
+        return [folder for shard in shards for folder in DirSnapshot(shard).dir_paths()]
+    
+    def save(self, root):
+        """構成ファイルをルートフォルダに保存（ルート直下の構成では保存しない）"""
+        if not self.sharded:
+            return
+        data = {
+            "version": LAYOUT_VERSION,
+            "type": self.kind,
+            "depth": self.depth,
+            "width": self.width,
+            "columns": self.columns,
+            "assignments": self.assignments,
+        }
+        with open(Path(root) / LAYOUT_FILENAME, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+    
+    def _computed_shard(self, folder_name):
+        """ハッシュ・先頭文字の構成のシャード名のリスト"""
+        if self.kind == "flat":
+            return []
+        
+        account_key = normalize_match_key(get_account_name(folder_name))
+        if self.kind == "hash":
+            source = hashlib.sha256(account_key.encode("utf-8")).hexdigest()
+        else:
+            source = account_key.ljust(self.depth * self.width, "_")
+        return [
+            _shard_name(source[level * self.width:(level + 1) * self.width])
+            for level in range(self.depth)
+        ]
+
+
+def load_folder_layout(root):
+    """
+    ルートフォルダの構成ファイルを読み込む
+    
+    Args:
+        root (Path or str): 個人フォルダ群のルートフォルダ
+    
+    Returns:
+        FolderLayout: 構成（構成ファイルがない・読み込めない場合はルート直下の構成）
+    """
+    layout_path = Path(root) / LAYOUT_FILENAME
+    try:
+        with open(layout_path, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return FolderLayout()
+    except (OSError, ValueError) as e:
+        logger.warning(f"フォルダ構成ファイルを読み込めませんでした（ルート直下として処理します）: {e}")
+        return FolderLayout()
+    
+    if not isinstance(data, dict) or data.get("version") != LAYOUT_VERSION:
+        logger.warning("フォルダ構成ファイルの形式が異なります（ルート直下として処理します）")
+        return FolderLayout()
+    
+    try:
+        return FolderLayout(
+            data.get("type", "flat"),
+            depth=data.get("depth", 1),
+            width=data.get("width", 2),
+            columns=data.get("columns"),
+            assignments=data.get("assignments"),
+        )
+    except (TypeError, ValueError) as e:
+        logger.warning(f"フォルダ構成ファイルの内容が正しくありません（ルート直下として処理します）: {e}")
+        return FolderLayout()
+
+
+def list_student_folders(root):
+    """
+    ルートフォルダの構成に従ってすべての個人フォルダを列挙
+    
+    Args:
+        root (Path or str): 個人フォルダ群のルートフォルダ
+    
+    Returns:
+        list: 個人フォルダ（Path）のリスト（構成ファイルがなければルート直下のサブフォルダ）
+    """
+    return load_folder_layout(root).leaf_folders(root)
+
+
+def _shard_name(value):
+    """シャードのフォルダ名（使用できない文字を置換し、空の場合は EMPTY_SHARD_NAME）"""
+    value = str(value).strip()
+    if not value:
+        return EMPTY_SHARD_NAME
+    return clean_foldername(value)
@@ -0,0 +1,361 @@
+"""
+接頭辞照合ユーティリティ
+ファイル名とフォルダ名を先頭の文字列で照合する（トライ木）
+
+照合は名前そのものではなく照合用のキー（NFC正規化＋大文字・小文字の区別なし）で行う。
+"""
+import os
+from utils.file_operations import get_account_name
+from utils.unicode_normalizer import normalize_match_key
+
+
+# 照合方法
+MATCH_MODES = ("fixed", "auto", "longest", "account")
+MATCH_MODE_LABELS = {
+    "fixed": "文字数指定",
+    "auto": "文字数自動判定",
+    "longest": "最長一致",
+    "account": "アカウント名",
+}
+
+# 最長一致で候補が複数の場合に返す候補の上限
+CANDIDATE_LIMIT = 5
+
+# ファイル名でアカウント名の後に続く区切り文字（最長一致でアカウント名全体の一致を判定）
+ACCOUNT_DELIMITERS = "_@"
+
+
+def build_prefix_index(target_folders, match_length, keys=None):
+    """
+    フォルダ名の照合用キーの先頭N文字からフォルダを引く索引を作成
+    
+    Args:
+        target_folders (list): 振り分け先フォルダ（Path）のリスト
+        match_length (int): マッチング文字数
+        keys (list): フォルダごとの照合用キー（省略時はフォルダ名から作成）
+    
+    Returns:
+        tuple: (接頭辞 → フォルダ の辞書, 複数のフォルダで重複した接頭辞 → フォルダのリスト の辞書)
+               重複した接頭辞は前者に含めない
+    """
+    if keys is None:
+        keys = [normalize_match_key(target_folder.name) for target_folder in target_folders]
+    
+    candidates = {}
+    for target_folder, key in zip(target_folders, keys):
+        candidates.setdefault(key[:match_length], []).append(target_folder)
+    
+    index = {}
+    ambiguous = {}
+    for prefix, folders in candidates.items():
+        if len(folders) == 1:
+            index[prefix] = folders[0]
+        else:
+            ambiguous[prefix] = sorted(folders, key=lambda folder: folder.name)
+    
+    return index, ambiguous
+
+
+class _TrieNode:
+    """トライ木のノード"""
+    
+    __slots__ = ("children", "count", "first", "folder", "account_folders")
+    
+    def __init__(self):
+        self.children = {}
+        self.count = 0  # このノードを通るフォルダ数
+        self.first = None  # このノードを通る最初のフォルダ
+        self.folder = None  # フォルダ名がここで終わるフォルダ
+        self.account_folders = None  # アカウント名（@より前）がここで終わるフォルダのリスト
+
+
+class PrefixMatcher:
+    """
+    フォルダ名のトライ木によるファイル照合クラス
+    
+    照合方法:
+        fixed:   ファイル名とフォルダ名の先頭N文字が一致するフォルダ
+        auto:    アカウント名の異なるフォルダを区別できる最短の文字数N（min_length以上）を求めて
+                 fixedと同様に照合（メールアドレスのフォルダは、ファイル名にアカウント名全体が
+                 含まれる場合のみ。アカウント名・フォルダ名がN文字より短いフォルダは、ファイル名の
+                 「_」「@」または拡張子の前までと照合）
+        longest: ファイル名と最も長く一致し、1つに絞り込めるフォルダ（ファイル名にフォルダの
+                 アカウント名全体が含まれ、その後が「_」「@」または拡張子の場合のみ。
+                 アカウント名全体が一致しない候補の一覧はmin_length文字以上一致した場合のみ）
+        account: ファイル名の「_」より前の部分とアカウント名（@より前）が一致するフォルダ
+    
+    照合はファイル名の長さに比例する時間で行い、フォルダ数には依存しない。
+    フォルダ名の照合用キーは作成時に1回だけ、ファイル名は照合ごとに1回だけ正規化する。
+    トライ木は longest と account の場合のみ作成する（fixed と auto は接頭辞の辞書で照合）。
+    """
+    
+    def __init__(self, target_folders, mode="fixed", match_length=8, min_length=1, keys=None):
+        """
+        Args:
+            target_folders (list): 振り分け先フォルダ（Path）のリスト
+            mode (str): 照合方法（MATCH_MODESのいずれか）
+            match_length (int): fixedの場合のマッチング文字数
+            min_length (int): longestの場合に最低限一致させる文字数、autoの場合の最短の文字数
+            keys (list): フォルダごとの照合用キー（省略時はフォルダ名から作成）
+        """
+        if mode not in MATCH_MODES:
+            raise ValueError(f"不明な照合方法です: {mode}")
+        
+        if keys is None:
+            keys = [normalize_match_key(target_folder.name) for target_folder in target_folders]
+        
+        self.mode = mode
+        self.min_length = min_length
+        self.folder_count = len(target_folders)
+        self._root = _TrieNode()
+        if mode in ("longest", "account"):
+            for target_folder, key in zip(target_folders, keys):
+                self._insert(target_folder, key)
+        
+        self.unique_length, self.closest_pair = self._measure_uniqueness(target_folders, keys)
+        if mode == "auto":
+            # 区別できる最短の文字数が短すぎると、フォルダのない生徒のファイルを別の生徒に照合してしまう
+            self.match_length = max(self.unique_length or 0, min_length)
+        else:
+            self.match_length = match_length
+        
+        # 索引作成時点で分かる重複（照合キー → フォルダのリスト）
+        self._index = {}
+        self.ambiguous = {}
+        # フォルダ → アカウント名の照合用キー（autoではメールアドレスのフォルダのみ、longestでは全フォルダ）
+        self._account_keys = {}
+        self._short_key_length = 0  # autoでmatch_lengthより短い索引キーの最大文字数
+        if mode == "fixed":
+            self._index, self.ambiguous = build_prefix_index(target_folders, self.match_length, keys)
+        elif mode == "auto":
+            self._account_keys = {
+                target_folder: get_account_name(key) for target_folder, key in zip(target_folders, keys) if "@" in key
+            }
+            # アカウント名が短いフォルダは、索引キーが「@…」まで含まないようアカウント名までで索引する
+            index_keys = [
+                self._account_keys.get(target_folder, key)[:self.match_length]
+                for target_folder, key in zip(target_folders, keys)
+            ]
+            self._short_key_length = max(
+                (len(key) for key in index_keys if len(key) < self.match_length), default=0
+            )
+            self._index, self.ambiguous = build_prefix_index(target_folders, self.match_length, index_keys)
+        elif mode == "longest":
+            self._account_keys = {
+                target_folder: get_account_name(key) for target_folder, key in zip(target_folders, keys)
+            }
+        else:
+            self.ambiguous = self._duplicate_accounts()
+    
+    def match(self, file_name):
+        """
+        ファイル名に該当するフォルダを探す
+        
+        Args:
+            file_name (str): ファイル名
+        
+        Returns:
+            tuple: (フォルダ, 候補のリスト, 照合キー)
+                   1つに絞り込めた場合はフォルダ、候補が複数の場合は候補のリスト
+                   （longestでは最大CANDIDATE_LIMIT件）、該当なしの場合はフォルダがNoneで候補が空
+        """
+        name_key = normalize_match_key(file_name)
+        if self.mode == "fixed":
+            key = name_key[:self.match_length]
+            return self._index.get(key), self.ambiguous.get(key, []), key
+        if self.mode == "auto":
+            return self._match_auto(name_key)
+        if self.mode == "longest":
+            return self._match_longest(name_key)
+        return self._match_account(name_key)
+    
+    def summary_lines(self):
+        """
+        確認ダイアログ・ログ用の照合方法と重複の統計
+        
+        Returns:
+            list: 表示用の文字列のリスト
+        """
+        lines = []
+        if self.mode in ("fixed", "auto"):
+            suffix = "（自動判定）" if self.mode == "auto" else ""
+            lines.append(f"マッチング文字数: {self.match_length}文字{suffix}")
+        else:
+            lines.append(f"照合方法: {MATCH_MODE_LABELS[self.mode]}")
+        
+        if self.unique_length is not None:
+            lines.append(f"フォルダを区別できる最短の文字数: {self.unique_length}文字")
+        if self.closest_pair and self.closest_pair[2] > 0:
+            first, second, depth = self.closest_pair
+            lines.append(f"最も似ているフォルダ: {first} / {second}（先頭{depth}文字が共通）")
+        
+        if self.mode in ("longest", "auto"):
+            lines.append(f"最低一致文字数: {self.min_length}文字")
+        
+        if self.ambiguous:
+            folder_count = sum(len(folders) for folders in self.ambiguous.values())
+            what = "アカウント名" if self.mode == "account" else f"先頭{self.match_length}文字"
+            lines.append(f"{what}が重複するフォルダ: {folder_count}個（{len(self.ambiguous)}種類）")
+        
+        return lines
+    
+    def _insert(self, target_folder, key):
+        """フォルダ名の照合用キーをトライ木に追加"""
+        account_length = len(get_account_name(key))
+        node = self._root
+        self._visit(node, target_folder)
+        for depth, char in enumerate(key, 1):
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            node = child
+            self._visit(node, target_folder)
+            if depth == account_length:
+                if node.account_folders is None:
+                    node.account_folders = []
+                node.account_folders.append(target_folder)
+        node.folder = target_folder
+    
+    def _visit(self, node, target_folder):
+        """ノードを通るフォルダを記録"""
+        node.count += 1
+        if node.first is None:
+            node.first = target_folder
+    
+    def _measure_uniqueness(self, target_folders, keys):
+        """
+        フォルダを区別できる最短の文字数と、最も長く先頭が共通するフォルダの組を求める
+        
+        ファイル名から分かるのはアカウント名までのため、「アカウント名@」が異なるフォルダ同士を
+        区別できる文字数とする。並べ替えた隣同士の共通接頭辞の最大値+1文字で全組が区別できる。
+        
+        Returns:
+            tuple: (最短の文字数（フォルダがない場合None）, (フォルダ名, フォルダ名, 共通文字数) または None)
+        """
+        if not target_folders:
+            return None, None
+        
+        accounts = {}
+        for target_folder, key in zip(target_folders, keys):
+            at = key.find("@")
+            accounts.setdefault(key[:at + 1] if at >= 0 else key, target_folder.name)
+        
+        ordered = sorted(accounts)
+        longest = 0
+        closest_pair = None
+        for first, second in zip(ordered, ordered[1:]):
+            common = len(os.path.commonprefix((first, second)))
+            if common >= longest:
+                longest = common
+                closest_pair = (accounts[first], accounts[second], common)
+        
+        return longest + 1, closest_pair
+    
+    def _folders_under(self, node, limit=None):
+        """ノード以下のフォルダをフォルダ名順に取得（limit件まで）"""
+        folders = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.folder is not None:
+                folders.append(current.folder)
+                if limit is not None and len(folders) >= limit:
+                    break
+            stack.extend(current.children[char] for char in sorted(current.children, reverse=True))
+        return folders
+    
+    def _match_auto(self, name_key):
+        """
+        ファイル名（照合用キー）の先頭match_length文字でフォルダを探す
+        
+        見つからない場合は、索引キーが短いフォルダ（短いアカウント名など）に備えて、
+        ファイル名の「_」「@」または拡張子の前までの部分を長い順に照合する。
+        """
+        stem = os.path.splitext(name_key)[0]
+        keys = [name_key[:self.match_length]]
+        if self._short_key_length:
+            keys += [
+                stem[:length] for length in range(min(self._short_key_length, len(stem)), 0, -1)
+                if self._ends_account(stem, length)
+            ]
+        
+        for key in keys:
+            if key in self.ambiguous:
+                return None, self.ambiguous[key], key
+            folder = self._index.get(key)
+            if folder is None:
+                continue
+            account_key = self._account_keys.get(folder)
+            if account_key is not None and not self._covers_account(stem, account_key):
+                # 先頭だけ一致する別の生徒のフォルダには照合しない
+                continue
+            return folder, [], key
+        return None, [], keys[0]
+    
+    def _match_longest(self, file_name):
+        """ファイル名（照合用キー）と最も長く一致するフォルダを探す"""
+        node = self._root
+        depth = 0
+        for char in file_name:
+            child = node.children.get(char)
+            if child is None:
+                break
+            node = child
+            depth += 1
+        
+        key = file_name[:depth]
+        
+        # アカウント名全体が一致する場合は、短いアカウント名（min_length未満）でも照合する
+        stem = os.path.splitext(file_name)[0]
+        if node.account_folders and self._ends_account(stem, depth):
+            # アカウント名全体がファイル名の先頭と一致する場合はそのフォルダ
+            if len(node.account_folders) == 1:
+                return node.account_folders[0], [], key
+            return None, sorted(node.account_folders, key=lambda folder: folder.name), key
+        if node.count == 1:
+            # 1つに絞り込めても、ファイル名がアカウント名全体を含まない場合（別の生徒）は照合しない
+            if self._covers_account(stem, self._account_keys[node.first]):
+                return node.first, [], key
+            return None, [], key
+        if depth < self.min_length:
+            return None, [], key
+        return None, self._folders_under(node, limit=CANDIDATE_LIMIT), key
+    
+    def _covers_account(self, stem, account_key):
+        """ファイル名（拡張子を除く照合用キー）がアカウント名の照合用キー全体で始まり、その後が区切りか"""
+        return stem.startswith(account_key) and self._ends_account(stem, len(account_key))
+    
+    def _ends_account(self, stem, length):
+        """ファイル名（拡張子を除く照合用キー）の先頭length文字の後がアカウント名の区切りか"""
+        return length >= len(stem) or stem[length] in ACCOUNT_DELIMITERS
+    
+    def _match_account(self, file_name):
+        """ファイル名（照合用キー）の「_」より前とアカウント名が一致するフォルダを探す"""
+        node = self._root
+        found = None
+        key = file_name.split("_", 1)[0]
+        for depth, char in enumerate(file_name):
+            if char == "_" and node.account_folders:
+                found = node.account_folders
+                key = file_name[:depth]
+            node = node.children.get(char)
+            if node is None:
+                break
+        
+        if found is None:
+            return None, [], key
+        if len(found) == 1:
+            return found[0], [], key
+        return None, sorted(found, key=lambda folder: folder.name), key
+    
+    def _duplicate_accounts(self):
+        """アカウント名が同じフォルダを取得"""
+        duplicates = {}
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.account_folders and len(node.account_folders) > 1:
+                folders = sorted(node.account_folders, key=lambda folder: folder.name)
+                duplicates[get_account_name(folders[0].name)] = folders
+            stack.extend(node.children.values())
+        return duplicates
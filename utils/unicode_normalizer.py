@@ -24,6 +24,25 @@ def normalize_string(text):
     return normalized
 
 
+def normalize_match_key(text):
+    """
+    照合用のキーを作成する（NFC正規化＋大文字・小文字の区別なし）
+    
+    macOSのスキャナやzip展開で濁点が分離したファイル名や、大文字・小文字だけが
+    異なるファイル名をフォルダ名と照合できるようにする。
+    
+    Args:
+        text (str): ファイル名・フォルダ名
+    
+    Returns:
+        str: 照合用のキー
+    """
+    if not text:
+        return text
+    
+    return normalize_string(text).casefold()
+
+
 def clean_filename(filename):
     """
     ファイル名として使用できない文字を置換する